@@ -4,16 +4,125 @@
 """
 
 from pathlib import Path
+from typing import Dict, List
+import argparse
 import json
-from config import Config, TextbookMetadata
-from utils.pdf_processor import PDFProcessor
-from utils.ocr_handler import OCRHandler
+import time
+from config import Config, TextbookMetadata, CatalogueEntry
+from utils.pdf_processor import PDFProcessor, RenderPolicy
+from utils.ocr_handler import OCRHandler, iter_pdf_pages_parallel, summarize_page
+from utils.ocr_manifest import OCRManifest
+from utils.ocr_batch import BookJob, run_book_jobs
+from utils.page_store import convert_json_dir
+from utils.timing import (
+    TIMING_LOG_FILENAME, TimingLog, aggregate_timings, new_run_id, read_timing_log
+)
+
+def ocr_output_dir(metadata: TextbookMetadata) -> Path:
+    """Директория результатов OCR учебника (у частей — свой суффикс)"""
+    return Config.OCR_DIR / metadata.book_key()
+
+def render_policy_from_config() -> RenderPolicy:
+    return RenderPolicy(
+        dpi=Config.OCR_DPI,
+        adaptive=Config.OCR_ADAPTIVE_DPI,
+        grayscale=Config.OCR_GRAYSCALE,
+        min_dpi=Config.OCR_MIN_DPI,
+        max_dpi=Config.OCR_MAX_DPI
+    )
+
+def write_ocr_summary(
+    output_dir: Path,
+    metadata: TextbookMetadata,
+    manifest: OCRManifest,
+    page_range: range,
+    results: List[Dict],
+    elapsed: float,
+    run_stats: Dict,
+    timing_log: TimingLog
+) -> Dict:
+    """
+    Сводка прогона по учебнику: пишет summary.json (и pages.bin, если включён)
+    
+    results — сводки страниц этого запуска (summarize_page). Статистика по
+    книге (pages_by_source, overall_statistics) считается по сводкам всех
+    готовых страниц из манифеста, включая прошлые запуски. Если в этом
+    запуске не распознано ни одной страницы, скорость, время стадий и
+    статистика кэша остаются от прошлого summary.json.
+    """
+    summary_path = output_dir / "summary.json"
+    previous = {}
+    if summary_path.exists():
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    
+    pages_per_second = len(results) / elapsed if results and elapsed > 0 else 0.0
+    print(f"Скорость: {pages_per_second:.2f} стр/с ({len(results)} стр. за {elapsed:.1f} с)")
+    
+    stage_timings = aggregate_timings(read_timing_log(timing_log.path, timing_log.run_id))
+    if stage_timings:
+        print("Время стадий (p50 / p90 на страницу, с): " + ", ".join(
+            f"{stage} {stats['p50']:.3f} / {stats['p90']:.3f}"
+            for stage, stats in stage_timings.items()
+        ))
+    
+    run_summary = {
+        'pages_per_second': pages_per_second,
+        **run_stats,
+        'timings': {
+            'log': TIMING_LOG_FILENAME,
+            'run_id': timing_log.run_id,
+            'stages': stage_timings
+        }
+    }
+    if not results and previous:
+        run_summary = {
+            key: value for key, value in previous.items()
+            if key in ('pages_per_second', 'line_cache', 'timings')
+        }
+    
+    book_pages = manifest.page_summaries(page_range)
+    total_lines = sum(page['total_lines'] for page in book_pages)
+    
+    # Сохраняем сводный результат
+    summary = {
+        'metadata': metadata.model_dump(),
+        'total_pages_processed': len(manifest.done_pages(page_range)),
+        'pages_processed_this_run': len(results),
+        'pages_by_source': {
+            source: sum(1 for page in book_pages if page['source'] == source)
+            for source in ('native', 'ocr')
+        },
+        'overall_statistics': {
+            'avg_confidence': (
+                sum(page['avg_confidence'] * page['total_lines'] for page in book_pages) / total_lines
+                if total_lines else 0.0
+            ),
+            'total_lines_recognized': total_lines
+        },
+        **run_summary,
+        'manifest': OCRManifest.FILENAME,
+        'output_dir': str(output_dir)
+    }
+    
+    # Компактная копия всех страниц для быстрого чтения на следующих шагах
+    if Config.OCR_WRITE_PAGE_STORE:
+        store_path = convert_json_dir(output_dir)
+        summary['page_store'] = store_path.name
+    
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    
+    return summary
 
 def extract_textbook_ocr(
     pdf_path: Path,
     metadata: TextbookMetadata,
     start_page: int = 0,
-    end_page: int | None = None
+    end_page: int | None = None,
+    num_workers: int = Config.OCR_NUM_WORKERS,
+    use_native_text: bool = Config.OCR_USE_NATIVE_TEXT,
+    use_angle_cls: bool | None = Config.OCR_ANGLE_CLS
 ):
     """
     Извлекает текст из учебника
@@ -23,16 +132,22 @@ def extract_textbook_ocr(
         metadata: Метаданные учебника
         start_page: Начальная страница (0-indexed)
         end_page: Конечная страница (None = до конца)
+        num_workers: Число процессов OCR (1 = последовательная обработка)
+        use_native_text: Брать текстовый слой PDF вместо OCR, где он пригоден
+        use_angle_cls: Классификатор поворота строк (None — решить по пробе
+            ориентации: для ровных сканов он отключается)
+    
+    Returns:
+        List[Dict]: сводки страниц, обработанных в этом запуске (summarize_page)
     """
     print(f"Обработка учебника: {metadata.title}")
     
     # Создаём директорию для результатов
-    output_dir = Config.OCR_DIR / f"{metadata.subject}_{metadata.grade}"
+    output_dir = ocr_output_dir(metadata)
     output_dir.mkdir(exist_ok=True)
     
     # Инициализация процессоров
     pdf_processor = PDFProcessor(pdf_path)
-    ocr_handler = OCRHandler(lang=Config.OCR_LANG, use_gpu=Config.OCR_USE_GPU)
     
     # Определяем диапазон страниц
     total_pages = pdf_processor.get_page_count()
@@ -42,23 +157,80 @@ def extract_textbook_ocr(
     print(f"Всего страниц: {total_pages}")
     print(f"Обработка страниц: {start_page} - {end_page}")
     
-    # Обработка
-    results = ocr_handler.process_pdf_pages(
-        pdf_processor,
-        (start_page, end_page),
-        output_dir
+    render_policy = render_policy_from_config()
+    
+    # Манифест: пропускаем страницы, распознанные в прошлых запусках
+    manifest = OCRManifest.load(
+        output_dir, pdf_path, render_policy.to_dict(), lang=Config.OCR_LANG,
+        use_native_text=use_native_text,
+        use_layout=Config.OCR_USE_LAYOUT,
+        layout_lang=Config.OCR_LAYOUT_LANG
     )
+    page_range = range(start_page, end_page)
+    already_done = len(manifest.done_pages(page_range))
+    if already_done:
+        print(f"Уже обработано ранее: {already_done} страниц (пропускаем)")
     
-    # Сохраняем сводный результат
-    summary = {
-        'metadata': metadata.model_dump(),
-        'total_pages_processed': len(results),
-        'output_dir': str(output_dir)
-    }
+    # Время стадий каждой страницы дописывается в timings.jsonl
+    timing_log = TimingLog(output_dir / TIMING_LOG_FILENAME, run_id=new_run_id())
     
-    summary_path = output_dir / "summary.json"
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    # Обработка: страницы приходят потоком, в памяти остаются только сводки
+    started = time.perf_counter()
+    run_stats = {}
+    if num_workers > 1:
+        page_summaries = iter_pdf_pages_parallel(
+            pdf_path,
+            (start_page, end_page),
+            output_dir,
+            num_workers=num_workers,
+            render_policy=render_policy,
+            lang=Config.OCR_LANG,
+            use_gpu=Config.OCR_USE_GPU,
+            manifest=manifest,
+            use_native_text=use_native_text,
+            rec_batch_size=Config.OCR_REC_BATCH_SIZE,
+            page_batch_size=Config.OCR_PAGE_BATCH_SIZE,
+            use_angle_cls=use_angle_cls,
+            line_cache_size=Config.OCR_LINE_CACHE_SIZE,
+            use_layout=Config.OCR_USE_LAYOUT,
+            layout_lang=Config.OCR_LAYOUT_LANG,
+            run_stats=run_stats,
+            timing_log=timing_log,
+            shard_size=Config.OCR_BATCH_SHARD_PAGES
+        )
+    else:
+        ocr_handler = OCRHandler(
+            lang=Config.OCR_LANG,
+            use_gpu=Config.OCR_USE_GPU,
+            rec_batch_size=Config.OCR_REC_BATCH_SIZE,
+            page_batch_size=Config.OCR_PAGE_BATCH_SIZE,
+            use_angle_cls=use_angle_cls,
+            line_cache_size=Config.OCR_LINE_CACHE_SIZE,
+            use_layout=Config.OCR_USE_LAYOUT,
+            layout_lang=Config.OCR_LAYOUT_LANG
+        )
+        page_summaries = (
+            summarize_page(page_num, page_result)
+            for page_num, page_result in ocr_handler.iter_pdf_pages(
+                pdf_processor,
+                (start_page, end_page),
+                output_dir,
+                render_policy=render_policy,
+                manifest=manifest,
+                use_native_text=use_native_text,
+                timing_log=timing_log
+            )
+        )
+    
+    results = list(page_summaries)
+    
+    if num_workers <= 1 and ocr_handler.line_cache is not None:
+        run_stats['line_cache'] = ocr_handler.line_cache_stats()
+    
+    elapsed = time.perf_counter() - started
+    write_ocr_summary(
+        output_dir, metadata, manifest, page_range, results, elapsed, run_stats, timing_log
+    )
     
     print(f"✓ OCR завершён. Результаты в: {output_dir}")
     
@@ -66,7 +238,122 @@ def extract_textbook_ocr(
     
     return results
 
+def load_catalogue(catalogue_path: Path) -> List[CatalogueEntry]:
+    """
+    Читает каталог учебников: JSON-список записей CatalogueEntry
+    
+    Пример записи:
+        {"pdf": "tkacheva_math_5_part1.pdf", "priority": 1,
+         "metadata": {"title": "...", "author": "...", "year": 2023,
+                      "grade": 5, "subject": "математика", "part": 1}}
+    """
+    with open(catalogue_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    
+    return [CatalogueEntry.model_validate(entry) for entry in entries]
+
+def extract_catalogue_ocr(
+    catalogue_path: Path,
+    num_workers: int = Config.OCR_NUM_WORKERS,
+    use_native_text: bool = Config.OCR_USE_NATIVE_TEXT,
+    use_angle_cls: bool | None = Config.OCR_ANGLE_CLS
+) -> Dict[str, List[Dict]]:
+    """
+    Пакетный OCR всех учебников каталога
+    
+    Страницы всех книг делятся на задачи по Config.OCR_BATCH_SHARD_PAGES
+    и распознаются одним пулом из num_workers процессов: книги с большим
+    priority идут первыми, книги одного приоритета делят пул поровну.
+    summary.json книги пишется сразу, как только распознана её последняя
+    страница. Уже готовые по манифесту страницы пропускаются.
+    
+    Returns:
+        Dict[output_dir, сводки страниц книги, обработанных в этом запуске]
+    """
+    entries = load_catalogue(catalogue_path)
+    print(f"Каталог: {len(entries)} учебников")
+    
+    render_policy = render_policy_from_config()
+    
+    jobs = []
+    for order, entry in enumerate(entries):
+        pdf_path = entry.pdf if entry.pdf.is_absolute() else Config.RAW_DIR / entry.pdf
+        output_dir = ocr_output_dir(entry.metadata)
+        output_dir.mkdir(exist_ok=True)
+        
+        pdf_processor = PDFProcessor(pdf_path)
+        total_pages = pdf_processor.get_page_count()
+        pdf_processor.close()
+        
+        page_range = range(entry.start_page, entry.end_page or total_pages)
+        manifest = OCRManifest.load(
+            output_dir, pdf_path, render_policy.to_dict(), lang=Config.OCR_LANG,
+            use_native_text=use_native_text,
+            use_layout=Config.OCR_USE_LAYOUT,
+            layout_lang=Config.OCR_LAYOUT_LANG
+        )
+        pages = manifest.pending_pages(list(page_range))
+        print(
+            f"  {entry.metadata.title}: {len(pages)} из {len(page_range)} стр. "
+            f"(приоритет {entry.priority})"
+        )
+        
+        jobs.append(BookJob(
+            pdf_path,
+            entry.metadata,
+            output_dir,
+            pages,
+            page_range,
+            manifest,
+            TimingLog(output_dir / TIMING_LOG_FILENAME, run_id=new_run_id()),
+            shard_pages=Config.OCR_BATCH_SHARD_PAGES,
+            priority=entry.priority,
+            order=order
+        ))
+    
+    def on_book_done(job: BookJob, elapsed: float):
+        print(f"✓ {job.metadata.title}: результаты в {job.output_dir}")
+        write_ocr_summary(
+            job.output_dir, job.metadata, job.manifest, job.page_range,
+            job.summaries, elapsed, job.run_stats, job.timing_log
+        )
+    
+    run_book_jobs(
+        jobs,
+        num_workers=max(1, num_workers),
+        handler_kwargs={
+            'lang': Config.OCR_LANG,
+            'use_gpu': Config.OCR_USE_GPU,
+            'rec_batch_size': Config.OCR_REC_BATCH_SIZE,
+            'page_batch_size': Config.OCR_PAGE_BATCH_SIZE,
+            'use_angle_cls': use_angle_cls,
+            'line_cache_size': Config.OCR_LINE_CACHE_SIZE,
+            'use_layout': Config.OCR_USE_LAYOUT,
+            'layout_lang': Config.OCR_LAYOUT_LANG
+        },
+        render_policy=render_policy,
+        use_native_text=use_native_text,
+        on_book_done=on_book_done
+    )
+    
+    return {str(job.output_dir): job.summaries for job in jobs}
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR учебников")
+    parser.add_argument(
+        '--catalogue', type=Path,
+        help="JSON-каталог учебников для пакетной обработки (см. load_catalogue)"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=Config.OCR_NUM_WORKERS,
+        help="число процессов OCR"
+    )
+    args = parser.parse_args()
+    
+    if args.catalogue:
+        extract_catalogue_ocr(args.catalogue, num_workers=args.workers)
+        raise SystemExit(0)
+    
     # Пример: Учебник Ткачёвой
     pdf_path = Config.RAW_DIR / "tkacheva_math_5_part1.pdf"
     
@@ -84,5 +371,6 @@ if __name__ == "__main__":
         pdf_path=pdf_path,
         metadata=metadata,
         start_page=2,  # 0-indexed, стр. 3 в PDF
-        end_page=17
+        end_page=17,
+        num_workers=args.workers
     )
\ No newline at end of file
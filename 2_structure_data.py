@@ -3,26 +3,70 @@
 Структурирование извлечённых данных в chunks
 """
 
+import argparse
+import copy
+import hashlib
 import json
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple
 from config import Config, TextbookMetadata
-import re
+from utils.page_store import iter_ocr_pages, list_ocr_pages
+from utils.layout import page_text_by_regions
+from utils.headings import TopicTracker, detect_headings, insert_heading_markers
+from utils.ocr_normalize import junk_reason, normalize_page_text
+from utils.chunk_cache import (
+    PageChunkCache, chunk_fingerprint, compute_text_hash, diff_chunks, load_chunk_fingerprints
+)
+from utils.chunk_io import CHUNKS_SUFFIX, ChunkWriter
+from utils.chunking import TokenChunker
+from utils.extraction import split_tasks, find_formulas, leading_text, scan_facts
+from utils.stitching import ChunkStitcher
 
 class ChunkCreator:
-    def __init__(self, subject: str):
+    # Версия правил извлечения: увеличить при изменении extract_* —
+    # тогда кэш структурирования сбросится и все страницы разберутся заново
+    VERSION = 10
+    
+    def __init__(self, subject: str, chunker: TokenChunker | None = None, drop_junk: bool = False):
         self.subject = subject
-        self.chunk_id_counter = 0
+        self.chunker = chunker
+        self.drop_junk = drop_junk
+        self.dropped = Counter()  # отброшенные chunks-мусор по причинам
+        self._issued_ids = {}
     
-    def create_chunk_id(self, metadata: Dict) -> str:
-        """Генерирует уникальный ID для chunk'а"""
-        self.chunk_id_counter += 1
-        return (
-            f"{self.subject}_{metadata['grade']}_"
-            f"ch{metadata.get('chapter', 0)}_"
-            f"p{metadata['page']}_"
-            f"{self.chunk_id_counter}"
-        )
+    def create_chunk_id(self, chunk: Dict) -> str:
+        """
+        Генерирует ID chunk'а из книги, страницы, номера задания и хэша содержимого
+        
+        ID не зависит от остальных chunks: вставка задания на одной странице
+        не меняет ID на других (глава в ID не входит — она определяется по
+        заголовкам предыдущих страниц), и при повторной загрузке неизменённые
+        chunks не пересчитываются. Совпадающие chunks одной страницы
+        различаются суффиксом по порядку появления.
+        """
+        metadata = chunk['metadata']
+        content_hash = hashlib.sha1(
+            json.dumps(chunk['content'], ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:12]
+        
+        parts = [self.subject, str(metadata['grade'])]
+        if metadata.get('part') is not None:
+            parts.append(f"part{metadata['part']}")
+        parts.append(f"p{metadata['page']}")
+        if 'task_number' in metadata:
+            parts.append(f"t{metadata['task_number']}")
+        parts.append(content_hash)
+        chunk_id = '_'.join(parts)
+        
+        # Одинаковые chunks на странице (например, повторённый абзац)
+        occurrence = self._issued_ids.get(chunk_id, 0)
+        self._issued_ids[chunk_id] = occurrence + 1
+        if occurrence:
+            chunk_id = f"{chunk_id}_{occurrence + 1}"
+        
+        return chunk_id
     
     def extract_math_tasks(self, page_text: str, page_num: int) -> List[Dict]:
         """
@@ -31,14 +75,29 @@ class ChunkCreator:
         Ищет паттерны типа:
         - "1. Заполните..."
         - "а) 5 см и 14 см;"
+        
+        Текст до первого задания возвращается chunk'ом с
+        metadata['continuation'] — это может быть окончание задания
+        с прошлой страницы (см. utils.stitching).
         """
         chunks = []
         
-        # Паттерн для заданий
-        task_pattern = r'(\d+)\.\s+(.*?)(?=\n\d+\.|$)'
-        tasks = re.findall(task_pattern, page_text, re.DOTALL)
+        lead = leading_text(page_text)
+        if lead:
+            chunks.append({
+                'chunk_id': f"math_temp_{page_num}_lead",
+                'metadata': {
+                    'page': page_num,
+                    'content_type': 'task',
+                    'continuation': True
+                },
+                'content': {
+                    'text': lead,
+                    'formulas': self._extract_formulas(lead)
+                }
+            })
         
-        for task_num, task_text in tasks:
+        for task_num, task_text in split_tasks(page_text):
             chunk = {
                 'chunk_id': f"math_temp_{page_num}_{task_num}",
                 'metadata': {
@@ -70,11 +129,8 @@ class ChunkCreator:
         paragraphs = [p.strip() for p in page_text.split('\n\n') if p.strip()]
         
         for idx, para in enumerate(paragraphs):
-            # Извлекаем даты
-            dates = re.findall(r'\b\d{1,4}\s*г\.?|\b\d{1,4}[-–]\d{1,4}\s*гг\.?', para)
-            
-            # Извлекаем имена (упрощённо - слова с заглавной буквы)
-            names = re.findall(r'\b[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+', para)
+            # Даты и имена (упрощённо - слова с заглавной буквы) за один проход
+            dates, names = scan_facts(para)
             
             chunk = {
                 'chunk_id': f"history_temp_{page_num}_{idx}",
@@ -82,7 +138,7 @@ class ChunkCreator:
                     'page': page_num,
                     'content_type': 'text',
                     'dates': dates,
-                    'historical_figures': list(set(names))
+                    'historical_figures': names
                 },
                 'content': {
                     'text': para
@@ -92,72 +148,413 @@ class ChunkCreator:
         
         return chunks
     
+    def extract_page(self, page_text: str, page_num: int) -> List[Dict]:
+        """
+        Chunks страницы по правилам предмета (для прочих предметов — пусто)
+        
+        При drop_junk chunks без осмысленного текста (OCR-шум) отбрасываются
+        и считаются в self.dropped. С chunker'ом мелкие задания и абзацы склеиваются,
+        а длинные режутся по числу токенов модели embeddings.
+        """
+        if self.subject == "математика":
+            chunks = self.extract_math_tasks(page_text, page_num)
+            separator = '\n'
+        elif self.subject == "история":
+            chunks = self.extract_history_content(page_text, page_num)
+            separator = '\n\n'
+        else:
+            return []
+        
+        if self.drop_junk:
+            chunks = self.filter_junk(chunks)
+        if self.chunker is None:
+            return chunks
+        
+        # Продолжение с прошлой страницы не склеивается с заданиями этой
+        lead = [chunk for chunk in chunks[:1] if chunk['metadata'].get('continuation')]
+        return (
+            self.chunker.fit(lead, self.annotate_chunk, separator)
+            + self.chunker.fit(chunks[len(lead):], self.annotate_chunk, separator)
+        )
+    
+    def fit_chunks(self, chunks: List[Dict]) -> List[Dict]:
+        """Приводит chunks к допустимой длине (после склейки через страницы)"""
+        if self.chunker is None:
+            return chunks
+        return self.chunker.fit(chunks, self.annotate_chunk)
+    
+    def filter_junk(self, chunks: List[Dict]) -> List[Dict]:
+        """
+        Убирает chunks-мусор (задания с формулами сохраняются всегда)
+        
+        У заданий не проверяется доля букв: в них много чисел и знаков.
+        """
+        kept = []
+        for chunk in chunks:
+            if chunk['content'].get('formulas'):
+                reason = None
+            elif 'task_number' in chunk['metadata']:
+                reason = junk_reason(chunk['content']['text'], min_letter_ratio=0.0)
+            else:
+                reason = junk_reason(chunk['content']['text'])
+            if reason is None:
+                kept.append(chunk)
+            else:
+                self.dropped[reason] += 1
+        return kept
+    
+    def annotate_chunk(self, chunk: Dict):
+        """Заново извлекает формулы / даты и имена из текста chunk'а"""
+        text = chunk['content']['text']
+        if 'formulas' in chunk['content']:
+            chunk['content']['formulas'] = self._extract_formulas(text)
+        if 'dates' in chunk['metadata']:
+            dates, names = scan_facts(text)
+            chunk['metadata']['dates'] = dates
+            chunk['metadata']['historical_figures'] = names
+    
     def _extract_formulas(self, text: str) -> List[str]:
         """Простое извлечение формул (можно улучшить)"""
         # Ищем математические выражения с =, +, -, *, /
-        formula_pattern = r'[a-zа-я0-9\s\+\-\*\/\(\)]+\s*=\s*[a-zа-я0-9\s\+\-\*\/\(\)]+'
-        formulas = re.findall(formula_pattern, text, re.IGNORECASE)
-        return [f.strip() for f in formulas]
+        return find_formulas(text)
+
+def iter_structured_pages(
+    ocr_dir: Path,
+    pages: List[int] | None,
+    subject: str,
+    known_hashes: Dict[int, str],
+    chunker: TokenChunker | None = None,
+    normalize: bool = False
+) -> Iterator[Tuple[int, str, List[Dict] | None, Dict[str, int]]]:
+    """
+    Разбирает страницы OCR-директории (pages = None — все)
+    
+    Args:
+        normalize: Чистить OCR-шум (utils.ocr_normalize) до разбора
+    
+    Yields:
+        (page_num, text_hash, chunks, dropped): chunks = None, если хэш
+        текста совпал с known_hashes[page_num] — страница берётся из кэша;
+        dropped — число отброшенных chunks-мусора по причинам. Среди chunks
+        могут быть маркеры заголовков {'heading': ...} (utils.headings)
+    """
+    chunk_creator = ChunkCreator(subject, chunker, drop_junk=normalize)
+    
+    # Читаем страницы (из pages.bin, если он актуален)
+    for page_num, page_data in iter_ocr_pages(ocr_dir, pages):
+        # При наличии разметки: области разделены пустой строкой, колонтитулы убраны
+        if normalize:
+            page_text = normalize_page_text(page_data)
+        else:
+            page_text = page_text_by_regions(page_data)
+        text_hash = compute_text_hash(page_text)
+        
+        if known_hashes.get(page_num) == text_hash:
+            yield page_num, text_hash, None, {}
+        else:
+            chunk_creator.dropped.clear()
+            chunks = chunk_creator.extract_page(page_text, page_num)
+            headings = detect_headings(page_data.get('ocr_results', []), normalize)
+            chunks = insert_heading_markers(chunks, headings, page_text)
+            yield page_num, text_hash, chunks, dict(chunk_creator.dropped)
+
+def _structure_shard(
+    ocr_dir: Path,
+    pages: List[int],
+    subject: str,
+    known_hashes: Dict[int, str],
+    chunker: TokenChunker | None = None,
+    normalize: bool = False
+) -> List[Tuple[int, str, List[Dict] | None, Dict[str, int]]]:
+    """Точка входа worker-процесса: разбирает непрерывный диапазон страниц"""
+    return list(iter_structured_pages(ocr_dir, pages, subject, known_hashes, chunker, normalize))
+
+def iter_structured_pages_parallel(
+    ocr_dir: Path,
+    subject: str,
+    known_hashes: Dict[int, str],
+    executor: Executor,
+    num_workers: int,
+    chunker: TokenChunker | None = None,
+    normalize: bool = False,
+    shards_per_worker: int = 4
+) -> Iterator[Tuple[int, str, List[Dict] | None, Dict[str, int]]]:
+    """
+    То же, что iter_structured_pages, но пулом процессов
+    
+    Страницы делятся на непрерывные диапазоны (по несколько на worker, чтобы
+    неравные по объёму страницы не оставляли процессы без работы), результаты
+    отдаются строго по возрастанию номеров страниц. В работе одновременно
+    не больше 2 * num_workers диапазонов, так что готовые, но ещё не
+    забранные результаты не копятся в памяти.
+    """
+    pages = list_ocr_pages(ocr_dir)
+    if not pages:
+        return
+    
+    num_shards = max(1, min(len(pages), num_workers * shards_per_worker))
+    shard_size = -(-len(pages) // num_shards)
+    shards = [pages[i:i + shard_size] for i in range(0, len(pages), shard_size)]
+    
+    pending = deque()
+    for shard in shards:
+        pending.append(executor.submit(
+            _structure_shard,
+            ocr_dir,
+            shard,
+            subject,
+            {page: known_hashes[page] for page in shard if page in known_hashes},
+            chunker,
+            normalize
+        ))
+        if len(pending) >= 2 * num_workers:
+            yield from pending.popleft().result()
+    
+    while pending:
+        yield from pending.popleft().result()
+
+def finalize_page_chunks(
+    chunks: List[Dict],
+    textbook_metadata: TextbookMetadata,
+    chunk_creator: ChunkCreator
+) -> List[Dict]:
+    """Добавляет к chunks общие метаданные учебника и финальные ID"""
+    # Кэш хранит chunks до добавления общих метаданных и ID
+    chunks = copy.deepcopy(chunks)
+    
+    # Добавляем общие метаданные
+    for chunk in chunks:
+        chunk['metadata'].update({
+            'textbook_title': textbook_metadata.title,
+            'grade': textbook_metadata.grade,
+            'subject': textbook_metadata.subject,
+            'author': textbook_metadata.author
+        })
+        if textbook_metadata.part is not None:
+            chunk['metadata']['part'] = textbook_metadata.part
+        
+        # Генерируем финальный ID
+        chunk['chunk_id'] = chunk_creator.create_chunk_id(chunk)
+    
+    return chunks
 
 def structure_textbook(
     ocr_dir: Path,
     textbook_metadata: TextbookMetadata,
-    output_dir: Path
+    output_dir: Path,
+    incremental: bool = True,
+    num_workers: int = Config.STRUCTURE_NUM_WORKERS,
+    executor: Executor | None = None
 ):
     """
     Структурирует OCR результаты в chunks
+    
+    При Config.OCR_NORMALIZE текст страниц сначала очищается от OCR-шума
+    (utils.ocr_normalize), а chunks-мусор отбрасывается — их число
+    выводится и попадает в *_chunks_diff.json. При Config.USE_TOKEN_CHUNKING длина chunks выравнивается по токенам
+    модели embeddings (utils.chunking): от MIN_CHUNK_SIZE до MAX_CHUNK_SIZE.
+    
+    Chunks пишутся потоком в {book_key}_chunks.jsonl (utils.chunk_io:
+    строка-заголовок с метаданными учебника, дальше chunk на строку) по
+    мере разбора страниц — в памяти не копится весь учебник.
+    
+    Инкрементально: chunks каждой страницы кэшируются по хэшу её текста
+    ({book_key}_page_cache.jsonl), и заново разбираются только
+    изменившиеся страницы. Рядом пишется *_chunks_diff.json — chunk_id
+    добавленных, удалённых и изменившихся chunks относительно прошлого запуска.
+    
+    Задания и абзацы, продолжающиеся на следующей странице, склеиваются
+    (utils.stitching) — у таких chunks есть metadata['page_end'].
+    
+    Глава и тема (metadata['chapter'], ['chapter_title'], ['topic'])
+    берутся из последнего заголовка перед chunk'ом (utils.headings).
+    
+    Страницы можно разбирать пулом процессов (num_workers > 1 или готовый
+    executor); chunks всё равно собираются и получают ID по порядку
+    страниц, так что результат не зависит от числа процессов.
+    
+    Args:
+        incremental: False — игнорировать кэш и разобрать все страницы
+        num_workers: Число процессов (1 — в текущем процессе)
+        executor: Общий пул процессов (например, для нескольких учебников)
+    
+    Returns:
+        Dict: {'chunks_file', 'total_chunks', 'diff'}
     """
     print(f"Структурирование: {textbook_metadata.title}")
     
-    chunk_creator = ChunkCreator(textbook_metadata.subject)
-    all_chunks = []
+    file_stem = textbook_metadata.book_key()
+    output_file = output_dir / f"{file_stem}{CHUNKS_SUFFIX}"
+    cache_path = output_dir / f"{file_stem}_page_cache.jsonl"
+    chunker = TokenChunker() if Config.USE_TOKEN_CHUNKING else None
+    cache_settings = {
+        'subject': textbook_metadata.subject,
+        'version': ChunkCreator.VERSION,
+        'chunking': chunker.settings() if chunker else None,
+        'normalize': Config.OCR_NORMALIZE,
+        'junk': [Config.JUNK_MIN_LETTERS, Config.JUNK_MIN_LETTER_RATIO],
+        'headings': [Config.HEADING_HEIGHT_RATIO, Config.HEADING_COVER_RATIO, Config.HEADING_MAX_CHARS]
+    }
+    if incremental:
+        page_cache = PageChunkCache.load(cache_path, cache_settings)
+    else:
+        page_cache = PageChunkCache(cache_path, cache_settings)
+    previous_chunks = load_chunk_fingerprints(output_file)
     
-    # Читаем все страницы
-    page_files = sorted(ocr_dir.glob("page_*.json"))
+    chunk_creator = ChunkCreator(textbook_metadata.subject, chunker)
+    stitcher = ChunkStitcher(
+        chunk_creator.annotate_chunk,
+        chunk_creator.fit_chunks,
+        marked_only=textbook_metadata.subject == "математика"
+    )
+    topics = TopicTracker()
+    new_chunks = {}  # chunk_id -> отпечаток, для diff
+    seen_pages = []
+    changed_pages = []
+    dropped = Counter()  # chunks-мусор на разобранных заново страницах
     
-    for page_file in page_files:
-        with open(page_file, 'r', encoding='utf-8') as f:
-            page_data = json.load(f)
-        
-        page_num = int(page_file.stem.split('_')[1])
-        page_text = page_data['text']
-        
-        # Извлекаем chunks в зависимости от предмета
-        if textbook_metadata.subject == "математика":
-            chunks = chunk_creator.extract_math_tasks(page_text, page_num)
-        elif textbook_metadata.subject == "история":
-            chunks = chunk_creator.extract_history_content(page_text, page_num)
-        else:
+    known_hashes = page_cache.hashes()
+    own_executor = None
+    if executor is None and num_workers > 1:
+        executor = own_executor = ProcessPoolExecutor(max_workers=num_workers)
+    
+    if executor is not None:
+        page_results = iter_structured_pages_parallel(
+            ocr_dir, textbook_metadata.subject, known_hashes, executor, num_workers,
+            chunker, Config.OCR_NORMALIZE
+        )
+    else:
+        page_results = iter_structured_pages(
+            ocr_dir, None, textbook_metadata.subject, known_hashes, chunker, Config.OCR_NORMALIZE
+        )
+    
+    def write_chunks(writer: ChunkWriter, chunks: List[Dict]):
+        for chunk in finalize_page_chunks(chunks, textbook_metadata, chunk_creator):
+            writer.write(chunk)
+            new_chunks[chunk['chunk_id']] = chunk_fingerprint(chunk)
+    
+    try:
+        with ChunkWriter(output_file, textbook_metadata.model_dump()) as writer:
+            for page_num, text_hash, chunks, page_dropped in page_results:
+                seen_pages.append(page_num)
+                
+                if chunks is None:
+                    chunks = page_cache.get(page_num, text_hash)
+                else:
+                    changed_pages.append(page_num)
+                    dropped.update(page_dropped)
+                page_cache.put(page_num, text_hash, chunks)
+                
+                # Глава и тема зависят от предыдущих страниц — не кэшируются
+                heading_first = bool(chunks) and 'heading' in chunks[0]
+                chunks = topics.assign(chunks)
+                
+                # Последний chunk страницы ждёт начала следующей
+                write_chunks(writer, stitcher.feed(page_num, chunks, heading_first))
+            write_chunks(writer, stitcher.finish())
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown()
+    
+    page_cache.save()
+    seen = set(seen_pages)
+    removed_pages = sorted(page_num for page_num in known_hashes if page_num not in seen)
+    
+    # Разница с прошлым запуском — для обновления эмбеддингов
+    diff = diff_chunks(previous_chunks, new_chunks)
+    diff.update({
+        'pages_reprocessed': changed_pages,
+        'pages_removed': removed_pages,
+        'chunks_dropped': dict(dropped),
+        'chunks_stitched': stitcher.stitched
+    })
+    with open(output_dir / f"{file_stem}_chunks_diff.json", 'w', encoding='utf-8') as f:
+        json.dump(diff, f, ensure_ascii=False, indent=2)
+    
+    print(
+        f"Страниц разобрано заново: {len(changed_pages)} из {len(seen_pages)}; "
+        f"chunks: +{len(diff['added'])} -{len(diff['removed'])} ~{len(diff['changed'])}"
+    )
+    print(f"Заголовков найдено: {topics.headings_seen}, глав: {topics.chapter}")
+    if stitcher.stitched:
+        print(f"Склеено продолжений на следующей странице: {stitcher.stitched}")
+    if dropped:
+        reasons = ', '.join(f"{reason}: {count}" for reason, count in sorted(dropped.items()))
+        print(f"Отброшено chunks-мусора: {sum(dropped.values())} ({reasons})")
+    print(f"✓ Создано {writer.count} chunks. Сохранено в: {output_file}")
+    
+    return {
+        'chunks_file': str(output_file),
+        'total_chunks': writer.count,
+        'diff': diff
+    }
+
+def structure_all_textbooks(
+    ocr_root: Path = Config.OCR_DIR,
+    output_dir: Path = Config.STRUCTURED_DIR,
+    num_workers: int = Config.STRUCTURE_NUM_WORKERS,
+    incremental: bool = True
+) -> Dict[str, Dict]:
+    """
+    Структурирует все OCR-директории в ocr_root
+    
+    Метаданные учебника берутся из summary.json, который пишет
+    1_ocr_extract.py; директории без него пропускаются. Все учебники
+    разбираются одним пулом из num_workers процессов.
+    
+    Returns:
+        Dict[имя директории, сводка structure_textbook]
+    """
+    books = []
+    for ocr_dir in sorted(path for path in ocr_root.iterdir() if path.is_dir()):
+        summary_path = ocr_dir / "summary.json"
+        if not summary_path.exists():
+            print(f"Пропуск {ocr_dir.name}: нет summary.json")
             continue
         
-        # Добавляем общие метаданные
-        for chunk in chunks:
-            chunk['metadata'].update({
-                'textbook_title': textbook_metadata.title,
-                'grade': textbook_metadata.grade,
-                'subject': textbook_metadata.subject,
-                'author': textbook_metadata.author
-            })
-            
-            # Генерируем финальный ID
-            chunk['chunk_id'] = chunk_creator.create_chunk_id(chunk['metadata'])
-        
-        all_chunks.extend(chunks)
-    
-    # Сохраняем структурированные данные
-    output_file = output_dir / f"{textbook_metadata.subject}_{textbook_metadata.grade}_chunks.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'metadata': textbook_metadata.model_dump(),
-            'chunks': all_chunks,
-            'total_chunks': len(all_chunks)
-        }, f, ensure_ascii=False, indent=2)
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            metadata = TextbookMetadata.model_validate(json.load(f)['metadata'])
+        books.append((ocr_dir, metadata))
     
-    print(f"✓ Создано {len(all_chunks)} chunks. Сохранено в: {output_file}")
+    print(f"Учебников для структурирования: {len(books)}")
     
-    return all_chunks
+    executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers > 1 else None
+    try:
+        return {
+            ocr_dir.name: structure_textbook(
+                ocr_dir,
+                metadata,
+                output_dir,
+                incremental=incremental,
+                num_workers=num_workers,
+                executor=executor
+            )
+            for ocr_dir, metadata in books
+        }
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Структурирование OCR в chunks")
+    parser.add_argument(
+        '--all', action='store_true',
+        help="структурировать все директории в Config.OCR_DIR"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=Config.STRUCTURE_NUM_WORKERS,
+        help="число процессов"
+    )
+    parser.add_argument(
+        '--full', action='store_true',
+        help="разобрать все страницы заново, без кэша"
+    )
+    args = parser.parse_args()
+    
+    if args.all:
+        structure_all_textbooks(num_workers=args.workers, incremental=not args.full)
+        raise SystemExit(0)
+    
     # Пример обработки математики
     ocr_dir = Config.OCR_DIR / "математика_5_v2"
     
@@ -173,5 +570,7 @@ if __name__ == "__main__":
     structure_textbook(
         ocr_dir=ocr_dir,
         textbook_metadata=metadata,
-        output_dir=Config.STRUCTURED_DIR
+        output_dir=Config.STRUCTURED_DIR,
+        incremental=not args.full,
+        num_workers=args.workers
     )   
\ No newline at end of file
@@ -3,21 +3,26 @@
 Создание embeddings и загрузка в ChromaDB
 """
 
-import json
 from pathlib import Path
 from typing import List, Dict
 import chromadb
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 from config import Config
+from utils.chunk_cache import chunk_fingerprint
+from utils.chunk_io import CHUNKS_SUFFIX, iter_chunks, read_chunks_metadata
+from utils.embedding_cache import EmbeddingCache, embedding_key
 
 class EmbeddingManager:
     def __init__(self, model_name: str = Config.EMBEDDING_MODEL):
         print(f"Загрузка модели embeddings: {model_name}")
         self.model = SentenceTransformer(model_name)
+        self.cache = EmbeddingCache(Config.EMBEDDING_CACHE_DIR, model_name) if Config.USE_EMBEDDING_CACHE else None
         
         # Инициализация ChromaDB
         self.client = chromadb.PersistentClient(path=str(Config.DB_DIR))
+        self._collections = {}
     
     def create_text_for_embedding(self, chunk: Dict) -> str:
         """
@@ -36,10 +41,12 @@ class EmbeddingManager:
             text_parts.append(f"Тема: {metadata['topic']}")
         
         if 'chapter' in metadata:
-            text_parts.append(f"Глава: {metadata['chapter']}")
+            chapter = metadata.get('chapter_title') or metadata['chapter']
+            text_parts.append(f"Глава: {chapter}")
         
         # Добавляем содержимое
-        text_parts.append(f"Содержание: {content['text'][:500]}")  # Первые 500 символов
+        # Длина содержимого уже ограничена по токенам модели (utils.chunking)
+        text_parts.append(f"Содержание: {content['text']}")
         
         # Для математики добавляем формулы
         if 'formulas' in content and content['formulas']:
@@ -57,17 +64,83 @@ class EmbeddingManager:
     def create_embeddings_for_chunks(self, chunks: List[Dict]) -> List[List[float]]:
         """
         Создаёт embeddings для списка chunks
+        
+        Тексты, уже закодированные этой моделью, берутся из кэша
+        (utils.embedding_cache), модель кодирует только остальные.
         """
         texts = [self.create_text_for_embedding(chunk) for chunk in chunks]
+        if self.cache is None:
+            print(f"Создание embeddings для {len(texts)} chunks...")
+            return self.encode(texts).tolist()
+        
+        keys = [embedding_key(text) for text in texts]
+        embeddings, missing = self.cache.get(keys)
+        print(
+            f"Создание embeddings для {len(texts)} chunks: "
+            f"из кэша {len(texts) - len(missing)}, кодируется {len(missing)}..."
+        )
+        if not missing:
+            return embeddings.tolist()
         
-        print(f"Создание embeddings для {len(texts)} chunks...")
-        embeddings = self.model.encode(
+        # Одинаковые тексты кодируются один раз
+        unique = {}
+        for idx in missing:
+            unique.setdefault(keys[idx], texts[idx])
+        encoded = self.encode(list(unique.values()))
+        self.cache.put(list(unique), encoded)
+        
+        rows = {key: row for row, key in enumerate(unique)}
+        if embeddings is None:
+            embeddings = np.zeros((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[missing] = encoded[[rows[keys[idx]] for idx in missing]]
+        return embeddings.tolist()
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embeddings текстов моделью"""
+        return self.model.encode(
             texts,
             show_progress_bar=True,
             batch_size=32
         )
+    
+    def get_collection(self, collection_name: str):
+        """Создаёт или получает коллекцию"""
+        if collection_name in self._collections:
+            return self._collections[collection_name]
         
-        return embeddings.tolist()
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            print(f"Коллекция '{collection_name}' уже существует. Добавление данных...")
+        except:
+            collection = self.client.create_collection(
+                name=collection_name,
+                metadata={"description": f"Textbook collection: {collection_name}"}
+            )
+            print(f"Создана новая коллекция: '{collection_name}'")
+        
+        self._collections[collection_name] = collection
+        return collection
+    
+    def get_stored_fingerprints(
+        self,
+        collection,
+        textbook_title: str,
+        part: int | None = None
+    ) -> Dict[str, str]:
+        """
+        chunk_id -> отпечаток содержимого для chunks учебника, уже лежащих в коллекции
+        
+        Части учебника с одним названием лежат в одной коллекции, поэтому
+        отбор — по названию и части (у книги без частей поля part нет).
+        Иначе устаревшими при загрузке одной части считались бы chunks другой.
+        """
+        stored = collection.get(where={'textbook_title': textbook_title}, include=['metadatas'])
+        fingerprints = {}
+        for chunk_id, metadata in zip(stored['ids'], stored['metadatas']):
+            metadata = metadata or {}
+            if metadata.get('part') == part:
+                fingerprints[chunk_id] = metadata.get('fingerprint')
+        return fingerprints
     
     def store_in_chromadb(
         self,
@@ -77,22 +150,18 @@ class EmbeddingManager:
     ):
         """
         Сохраняет chunks с embeddings в ChromaDB
+        
+        Используется upsert: chunk с уже существующим ID перезаписывается.
         """
-        # Создаём или получаем коллекцию
-        try:
-            collection = self.client.get_collection(name=collection_name)
-            print(f"Коллекция '{collection_name}' уже существует. Добавление данных...")
-        except:
-            collection = self.client.create_collection(
-                name=collection_name,
-                metadata={"description": f"Textbook collection: {collection_name}"}
-            )
-            print(f"Создана новая коллекция: '{collection_name}'")
+        collection = self.get_collection(collection_name)
         
         # Подготовка данных
         ids = [chunk['chunk_id'] for chunk in chunks]
         documents = [self.create_text_for_embedding(chunk) for chunk in chunks]
-        metadatas = [chunk['metadata'] for chunk in chunks]
+        metadatas = [
+            {**chunk['metadata'], 'fingerprint': chunk_fingerprint(chunk)}
+            for chunk in chunks
+        ]
         
         # Загрузка батчами
         batch_size = 100
@@ -102,7 +171,7 @@ class EmbeddingManager:
             batch_documents = documents[i:i + batch_size]
             batch_metadatas = metadatas[i:i + batch_size]
             
-            collection.add(
+            collection.upsert(
                 ids=batch_ids,
                 embeddings=batch_embeddings,
                 documents=batch_documents,
@@ -111,32 +180,76 @@ class EmbeddingManager:
         
         print(f"✓ Загружено {len(ids)} chunks в коллекцию '{collection_name}'")
 
-def process_chunks_file(chunks_file: Path, embedding_manager: EmbeddingManager):
+def process_chunks_file(
+    chunks_file: Path,
+    embedding_manager: EmbeddingManager,
+    batch_size: int = 1024
+):
     """
     Обрабатывает файл с chunks
+    
+    Файл читается потоком (utils.chunk_io), embeddings считаются и
+    загружаются пачками по batch_size chunks, поэтому память не зависит
+    от размера учебника.
+    
+    ID chunks стабильны (книга, страница, задание, хэш содержимого), поэтому
+    embeddings считаются только для новых и изменившихся chunks, а chunks
+    учебника, исчезнувшие из файла, удаляются из коллекции.
     """
     print(f"\nОбработка файла: {chunks_file.name}")
     
-    with open(chunks_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    chunks = data['chunks']
-    metadata = data['metadata']
+    metadata = read_chunks_metadata(chunks_file)
     
     # Название коллекции
     collection_name = f"{Config.CHROMA_COLLECTION_PREFIX}_{metadata['subject']}_{metadata['grade']}"
     
-    # Создаём embeddings
-    embeddings = embedding_manager.create_embeddings_for_chunks(chunks)
+    collection = embedding_manager.get_collection(collection_name)
+    stored = embedding_manager.get_stored_fingerprints(
+        collection, metadata['title'], metadata.get('part')
+    )
+    
+    def upload(batch: List[Dict]):
+        # Создаём embeddings
+        embeddings = embedding_manager.create_embeddings_for_chunks(batch)
+        
+        # Сохраняем в ChromaDB
+        embedding_manager.store_in_chromadb(batch, embeddings, collection_name)
     
-    # Сохраняем в ChromaDB
-    embedding_manager.store_in_chromadb(chunks, embeddings, collection_name)
+    current_ids = set()
+    total_chunks = 0
+    changed_chunks = 0
+    batch = []
+    for chunk in iter_chunks(chunks_file):
+        total_chunks += 1
+        current_ids.add(chunk['chunk_id'])
+        
+        # Пропускаем chunks, которые уже загружены в том же виде
+        if stored.get(chunk['chunk_id']) == chunk_fingerprint(chunk):
+            continue
+        
+        changed_chunks += 1
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            upload(batch)
+            batch = []
+    
+    if batch:
+        upload(batch)
+    
+    stale_ids = [chunk_id for chunk_id in stored if chunk_id not in current_ids]
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+    
+    print(
+        f"Новых или изменённых chunks: {changed_chunks} из {total_chunks}, "
+        f"удалено устаревших: {len(stale_ids)}"
+    )
 
 if __name__ == "__main__":
     embedding_manager = EmbeddingManager()
     
     # Обрабатываем все файлы chunks
-    chunks_files = list(Config.STRUCTURED_DIR.glob("*_chunks.json"))
+    chunks_files = list(Config.STRUCTURED_DIR.glob(f"*{CHUNKS_SUFFIX}"))
     
     if not chunks_files:
         print("Нет файлов chunks для обработки!")
@@ -146,4 +259,11 @@ if __name__ == "__main__":
     for chunks_file in chunks_files:
         process_chunks_file(chunks_file, embedding_manager)
     
+    if embedding_manager.cache is not None:
+        stats = embedding_manager.cache.stats()
+        print(
+            f"\nКэш embeddings: попаданий {stats['hits']}, промахов {stats['misses']} "
+            f"({stats['hit_rate']:.0%}), всего векторов {stats['entries']}"
+        )
+    
     print("\n✓ Все данные загружены в ChromaDB")
\ No newline at end of file
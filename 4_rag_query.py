@@ -20,10 +20,15 @@ class RAGSystem:
         query: str,
         subject: str,
         grade: int,
-        n_results: int = 3
+        n_results: int = 3,
+        chapter: int | None = None,
+        topic: str | None = None
     ) -> List[Dict]:
         """
         Ищет релевантные chunks для запроса
+        
+        chapter, topic: искать только среди chunks этой главы / темы
+        (metadata, проставленные 2_structure_data.py)
         """
         # Получаем коллекцию
         collection_name = f"{Config.CHROMA_COLLECTION_PREFIX}_{subject}_{grade}"
@@ -36,10 +41,23 @@ class RAGSystem:
         # Создаём embedding для запроса
         query_embedding = self.embedding_model.encode([query])[0].tolist()
         
+        # Фильтр по главе и теме сужает поиск до части учебника
+        conditions = []
+        if chapter is not None:
+            conditions.append({'chapter': chapter})
+        if topic is not None:
+            conditions.append({'topic': topic})
+        where = None
+        if len(conditions) == 1:
+            where = conditions[0]
+        elif conditions:
+            where = {'$and': conditions}
+        
         # Поиск
         results = collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=n_results,
+            where=where
         )
         
         # Форматируем результаты
@@ -97,7 +115,9 @@ class RAGSystem:
         subject: str,
         grade: int,
         n_results: int = 3,
-        verbose: bool = False
+        verbose: bool = False,
+        chapter: int | None = None,
+        topic: str | None = None
     ) -> Dict:
         """
         Полный цикл: поиск + генерация ответа
@@ -106,7 +126,7 @@ class RAGSystem:
         if verbose:
             print(f"\n🔍 Поиск информации в учебнике ({subject}, {grade} класс)...")
         
-        chunks = self.search_relevant_chunks(query, subject, grade, n_results)
+        chunks = self.search_relevant_chunks(query, subject, grade, n_results, chapter, topic)
         
         if verbose:
             print(f"✓ Найдено {len(chunks)} релевантных фрагментов:")
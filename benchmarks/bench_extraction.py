@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк извлечения chunks: скомпилированные шаблоны (utils.extraction)
+против прежних вызовов re.findall со строковыми шаблонами
+
+Запуск из корня проекта:
+    python benchmarks/bench_extraction.py [--pages 2000] [--repeat 3]
+
+Корпус синтетический: страницы рабочей тетради (нумерованные задания с
+формулами и подпунктами) и страницы учебника истории (абзацы с датами и
+именами). Перед замером результаты обеих реализаций сверяются.
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.extraction import split_tasks, find_formulas, scan_facts
+
+# Прежняя реализация ChunkCreator (до utils.extraction) — эталон для сверки
+
+def legacy_extract_formulas(text: str) -> List[str]:
+    formula_pattern = r'[a-zа-я0-9\s\+\-\*\/\(\)]+\s*=\s*[a-zа-я0-9\s\+\-\*\/\(\)]+'
+    formulas = re.findall(formula_pattern, text, re.IGNORECASE)
+    return [f.strip() for f in formulas]
+
+def legacy_math(page_text: str) -> List[Dict]:
+    task_pattern = r'(\d+)\.\s+(.*?)(?=\n\d+\.|$)'
+    tasks = re.findall(task_pattern, page_text, re.DOTALL)
+    return [
+        {'task_number': int(num), 'text': text.strip(), 'formulas': legacy_extract_formulas(text)}
+        for num, text in tasks
+    ]
+
+def legacy_history(page_text: str) -> List[Dict]:
+    paragraphs = [p.strip() for p in page_text.split('\n\n') if p.strip()]
+    chunks = []
+    for para in paragraphs:
+        dates = re.findall(r'\b\d{1,4}\s*г\.?|\b\d{1,4}[-–]\d{1,4}\s*гг\.?', para)
+        names = re.findall(r'\b[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+', para)
+        chunks.append({'text': para, 'dates': dates, 'names': list(set(names))})
+    return chunks
+
+# Новая реализация в том же виде
+
+def compiled_math(page_text: str) -> List[Dict]:
+    return [
+        {'task_number': int(num), 'text': text.strip(), 'formulas': find_formulas(text)}
+        for num, text in split_tasks(page_text)
+    ]
+
+def compiled_history(page_text: str) -> List[Dict]:
+    paragraphs = [p.strip() for p in page_text.split('\n\n') if p.strip()]
+    chunks = []
+    for para in paragraphs:
+        dates, names = scan_facts(para)
+        chunks.append({'text': para, 'dates': dates, 'names': names})
+    return chunks
+
+# Синтетический корпус
+
+WORDS = (
+    "найдите значение выражения сравните числа запишите ответ вычислите "
+    "периметр прямоугольника площадь квадрата длина сторона отрезок "
+    "задача решение скорость время расстояние км ч см"
+).split()
+NAMES = ["Пётр Первый", "Иван Грозный", "Александр Невский", "Дмитрий Донской",
+         "Михаил Кутузов", "Екатерина Великая", "Юрий Гагарин"]
+
+def make_math_page(rng: random.Random, first_task: int) -> str:
+    tasks = []
+    for task_num in range(first_task, first_task + rng.randint(3, 8)):
+        text = ' '.join(rng.choices(WORDS, k=rng.randint(8, 30)))
+        if rng.random() < 0.6:
+            a, b = rng.randint(1, 999), rng.randint(1, 999)
+            text += f": {a} + {b} = {a + b}"
+        subitems = '\n'.join(
+            f"{letter}) {rng.randint(1, 99)} см и {rng.randint(1, 99)} см;"
+            for letter in 'абвг'[:rng.randint(0, 4)]
+        )
+        tasks.append(f"{task_num}. {text}\n{subitems}".rstrip())
+    return '\n'.join(tasks)
+
+def make_history_page(rng: random.Random) -> str:
+    paragraphs = []
+    for _ in range(rng.randint(3, 7)):
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            sentence = ' '.join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize()
+            roll = rng.random()
+            if roll < 0.3:
+                sentence += f" в {rng.randint(800, 2000)} г."
+            elif roll < 0.45:
+                start = rng.randint(800, 1990)
+                sentence += f" в {start}–{start + rng.randint(1, 10)} гг."
+            if rng.random() < 0.4:
+                sentence = f"{rng.choice(NAMES)} {sentence.lower()}"
+            sentences.append(sentence + '.')
+        paragraphs.append('\n'.join(sentences))
+    return '\n\n'.join(paragraphs)
+
+def normalize(chunks: List[Dict]) -> List[Dict]:
+    """Имена в прежней реализации шли в порядке set — сравниваем без порядка"""
+    return [
+        {**chunk, 'names': sorted(chunk['names'])} if 'names' in chunk else chunk
+        for chunk in chunks
+    ]
+
+def bench(name: str, func: Callable[[str], List[Dict]], pages: List[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - started)
+    print(f"  {name:<10} {best:8.3f} с  ({len(pages) / best:9.0f} стр/с)")
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк извлечения chunks")
+    parser.add_argument('--pages', type=int, default=2000, help="страниц каждого предмета")
+    parser.add_argument('--repeat', type=int, default=3, help="повторов (берётся лучший)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    math_pages = [make_math_page(rng, 1 + idx * 8) for idx in range(args.pages)]
+    history_pages = [make_history_page(rng) for _ in range(args.pages)]
+    
+    # Длинная страница без "=": на ней прежний шаблон формул работал квадратично
+    long_page = "1. " + ' '.join(rng.choices(WORDS, k=4000))
+    
+    print("Сверка результатов...")
+    for page in math_pages + [long_page]:
+        assert legacy_math(page) == compiled_math(page), page[:200]
+    for page in history_pages:
+        assert normalize(legacy_history(page)) == normalize(compiled_history(page)), page[:200]
+    print("  ✓ совпадают")
+    
+    corpus_mb = sum(len(page) for page in math_pages + history_pages) / 1e6
+    print(f"Корпус: {len(math_pages)} + {len(history_pages)} стр., {corpus_mb:.1f} млн символов")
+    
+    print("Математика:")
+    legacy = bench("re.findall", legacy_math, math_pages, args.repeat)
+    compiled = bench("compiled", compiled_math, math_pages, args.repeat)
+    print(f"  ускорение: x{legacy / compiled:.1f}")
+    
+    print(f"Длинная страница без '=' ({len(long_page)} символов):")
+    legacy = bench("re.findall", legacy_math, [long_page], 1)
+    compiled = bench("compiled", compiled_math, [long_page], 1)
+    print(f"  ускорение: x{legacy / compiled:.0f}")
+    
+    print("История:")
+    legacy = bench("re.findall", legacy_history, history_pages, args.repeat)
+    compiled = bench("compiled", compiled_history, history_pages, args.repeat)
+    print(f"  ускорение: x{legacy / compiled:.1f}")
\ No newline at end of file
@@ -9,17 +9,34 @@ class Config:
     OCR_DIR = DATA_DIR / "ocr"
     STRUCTURED_DIR = DATA_DIR / "structured"
     DB_DIR = DATA_DIR / "db"
+    EMBEDDING_CACHE_DIR = DATA_DIR / "embeddings"
     
     # Создаём директории
-    for dir_path in [RAW_DIR, OCR_DIR, STRUCTURED_DIR, DB_DIR]:
+    for dir_path in [RAW_DIR, OCR_DIR, STRUCTURED_DIR, DB_DIR, EMBEDDING_CACHE_DIR]:
         dir_path.mkdir(parents=True, exist_ok=True)
     
     # OCR настройки
     OCR_LANG = 'ru'
     OCR_USE_GPU = False
+    OCR_DPI = 300
+    OCR_ADAPTIVE_DPI = False  # подбирать DPI по высоте строк на странице
+    OCR_MIN_DPI = 150
+    OCR_MAX_DPI = 400
+    OCR_GRAYSCALE = False  # одноканальный рендер вместо RGB
+    OCR_NUM_WORKERS = 1  # >1 — постраничный OCR пулом процессов
+    OCR_USE_NATIVE_TEXT = True  # брать текстовый слой PDF, если он качественный
+    OCR_REC_BATCH_SIZE = 16  # строк в батче модели распознавания (CPU)
+    OCR_PAGE_BATCH_SIZE = 4  # страниц, распознаваемых за один проход
+    OCR_ANGLE_CLS = None  # True/False — всегда/никогда, None — по пробе ориентации
+    OCR_LINE_CACHE_SIZE = 50000  # кэш повторяющихся строк (колонтитулы и т.п.), 0 — выкл.
+    OCR_USE_LAYOUT = False  # анализ разметки: OCR только текстовых областей
+    OCR_LAYOUT_LANG = 'en'  # модель разметки PP-Structure ('en' / 'ch')
+    OCR_WRITE_PAGE_STORE = True  # собирать page_*.json в бинарный pages.bin
+    OCR_BATCH_SHARD_PAGES = 8  # страниц в одной задаче пула (параллельный OCR книги и каталога)
     
     # Embeddings
     EMBEDDING_MODEL = 'ai-forever/ru-en-RoSBERTa'
+    USE_EMBEDDING_CACHE = True  # не кодировать заново тексты, уже посчитанные этой моделью
     
     # ChromaDB
     CHROMA_COLLECTION_PREFIX = "textbook"
@@ -28,7 +45,18 @@ class Config:
     OLLAMA_MODEL = "qwen3:8b"
     
     # Chunking параметры
-    MAX_CHUNK_SIZE = 2000  # токенов
+    MAX_CHUNK_SIZE = 2000  # токенов (не больше предела модели embeddings)
+    MIN_CHUNK_SIZE = 32  # токенов: меньшие фрагменты склеиваются с соседними
+    CHUNK_OVERLAP = 64  # токенов перекрытия между частями длинного фрагмента
+    CHUNK_PREFIX_TOKENS = 256  # запас под служебные строки текста для embedding: предмет, класс, тема и глава (до HEADING_MAX_CHARS), формулы, даты, личности
+    USE_TOKEN_CHUNKING = True  # False — chunks как есть (не нужен токенизатор)
+    OCR_NORMALIZE = True  # чистка OCR-шума (строки по bbox, двойники, переносы) перед разбором
+    JUNK_MIN_LETTERS = 4  # chunk с меньшим числом букв (в словах от 2 букв) — мусор
+    JUNK_MIN_LETTER_RATIO = 0.4  # ... или с меньшей долей букв среди непробельных символов
+    HEADING_HEIGHT_RATIO = 1.3  # строка выше основного текста во столько раз — заголовок
+    HEADING_COVER_RATIO = 3.0  # слово выше текста во столько раз — обложка/титул, заголовков нет
+    HEADING_MAX_CHARS = 120  # более длинные крупные строки заголовками не считаются
+    STRUCTURE_NUM_WORKERS = 1  # >1 — страницы структурируются пулом процессов
 
 class TextbookMetadata(BaseModel):
     title: str
@@ -37,4 +65,19 @@ class TextbookMetadata(BaseModel):
     grade: int
     subject: str  # "математика" или "история"
     isbn: str | None = None
-    part: int | None = None
\ No newline at end of file
+    part: int | None = None
+    
+    def book_key(self) -> str:
+        """Имя учебника в путях: предмет_класс[_partN]"""
+        key = f"{self.subject}_{self.grade}"
+        if self.part is not None:
+            key += f"_part{self.part}"
+        return key
+
+class CatalogueEntry(BaseModel):
+    """Учебник в каталоге пакетной обработки (1_ocr_extract.py --catalogue)"""
+    pdf: Path  # относительный путь — от Config.RAW_DIR
+    metadata: TextbookMetadata
+    start_page: int = 0
+    end_page: int | None = None
+    priority: int = 0  # книги с большим приоритетом распознаются раньше
\ No newline at end of file
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .chunk_io import iter_chunks
+
+def compute_text_hash(text: str) -> str:
+    """SHA-256 текста страницы"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def chunk_fingerprint(chunk: Dict) -> str:
+    """Хэш содержимого и метаданных chunk'а (без chunk_id)"""
+    payload = {key: value for key, value in chunk.items() if key != 'chunk_id'}
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+class PageChunkCache:
+    """
+    Кэш структурирования: хэш текста страницы -> chunks, извлечённые из неё
+    
+    Лежит рядом с файлом chunks в формате JSON Lines: заголовок с
+    настройками, затем по строке на страницу ({"page", "hash", "chunks"}).
+    Страница, текст которой не изменился, не разбирается заново. Если
+    изменились настройки (предмет, версия правил извлечения), кэш
+    сбрасывается целиком.
+    
+    В памяти держатся только хэши и смещения строк: chunks прошлого запуска
+    читаются с диска по запросу (get), а новый кэш пишется потоком (put)
+    во временный файл, который save() ставит на место старого. Страницы,
+    не переданные в put, из кэша выпадают.
+    """
+    def __init__(self, path: Path, settings: Dict, index: Dict[int, Tuple[str, int]] | None = None):
+        self.path = path
+        self.settings = settings
+        self.index = index or {}
+        self._reader = None
+        self._writer = None
+        self._tmp_path = path.with_name(path.name + '.tmp')
+    
+    @classmethod
+    def load(cls, path: Path, settings: Dict) -> "PageChunkCache":
+        if not path.exists():
+            return cls(path, settings)
+        
+        index = {}
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline() or b'{}')
+            if header.get('settings') != settings:
+                print("Правила структурирования изменились — все страницы будут разобраны заново")
+                return cls(path, settings)
+            
+            offset = f.tell()
+            for line in f:
+                entry = json.loads(line)
+                index[entry['page']] = (entry['hash'], offset)
+                offset += len(line)
+        
+        return cls(path, settings, index)
+    
+    def hashes(self) -> Dict[int, str]:
+        """Номер страницы -> хэш её текста из прошлого запуска"""
+        return {page_num: text_hash for page_num, (text_hash, _) in self.index.items()}
+    
+    def get(self, page_num: int, text_hash: str) -> List[Dict] | None:
+        """Chunks страницы, если её текст не изменился, иначе None"""
+        entry = self.index.get(page_num)
+        if entry is None or entry[0] != text_hash:
+            return None
+        
+        if self._reader is None:
+            self._reader = open(self.path, 'rb')
+        self._reader.seek(entry[1])
+        return json.loads(self._reader.readline())['chunks']
+    
+    def put(self, page_num: int, text_hash: str, chunks: List[Dict]):
+        """Записывает страницу в новый кэш (страницы — по возрастанию номеров)"""
+        if self._writer is None:
+            self._writer = open(self._tmp_path, 'w', encoding='utf-8')
+            self._writer.write(json.dumps({'settings': self.settings}, ensure_ascii=False) + '\n')
+        
+        self._writer.write(json.dumps(
+            {'page': page_num, 'hash': text_hash, 'chunks': chunks}, ensure_ascii=False
+        ) + '\n')
+    
+    def save(self):
+        """Атомарно заменяет кэш записанным через put"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        
+        if self._writer is None:
+            # Ни одной страницы — пустой кэш с текущими настройками
+            self._writer = open(self._tmp_path, 'w', encoding='utf-8')
+            self._writer.write(json.dumps({'settings': self.settings}, ensure_ascii=False) + '\n')
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self.path)
+
+def load_chunk_fingerprints(chunks_file: Path) -> Dict[str, str]:
+    """chunk_id -> отпечаток для ранее сохранённого файла chunks"""
+    if not chunks_file.exists():
+        return {}
+    
+    return {chunk['chunk_id']: chunk_fingerprint(chunk) for chunk in iter_chunks(chunks_file)}
+
+def diff_chunks(old: Dict[str, str], new: Dict[str, str]) -> Dict:
+    """
+    Разница между прошлым и новым набором chunks по chunk_id
+    
+    old, new: chunk_id -> отпечаток (chunk_fingerprint)
+    
+    Returns:
+        {'added': [...], 'removed': [...], 'changed': [...], 'unchanged': int}
+    """
+    return {
+        'added': [chunk_id for chunk_id in new if chunk_id not in old],
+        'removed': [chunk_id for chunk_id in old if chunk_id not in new],
+        'changed': [
+            chunk_id for chunk_id, fingerprint in new.items()
+            if chunk_id in old and old[chunk_id] != fingerprint
+        ],
+        'unchanged': sum(
+            1 for chunk_id, fingerprint in new.items()
+            if old.get(chunk_id) == fingerprint
+        )
+    }
\ No newline at end of file
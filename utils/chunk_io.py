@@ -0,0 +1,63 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator
+
+CHUNKS_SUFFIX = "_chunks.jsonl"
+
+class ChunkWriter:
+    """
+    Потоковая запись chunks в формате JSON Lines
+    
+    Первая строка — заголовок {"type": "header", "metadata": {...}},
+    дальше по одному chunk'у на строку. Запись идёт во временный файл,
+    который при успешном закрытии атомарно заменяет итоговый.
+    """
+    def __init__(self, path: Path, metadata: Dict):
+        self.path = path
+        self.count = 0
+        self._tmp_path = path.with_name(path.name + '.tmp')
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self._write_line({'type': 'header', 'metadata': metadata})
+    
+    def _write_line(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+    
+    def write(self, chunk: Dict):
+        self._write_line(chunk)
+        self.count += 1
+    
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+    
+    def abort(self):
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+    
+    def __enter__(self) -> "ChunkWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def read_chunks_metadata(path: Path) -> Dict:
+    """Метаданные учебника из заголовка файла chunks"""
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+    
+    if header.get('type') != 'header':
+        raise ValueError(f"{path}: нет заголовка chunks")
+    return header['metadata']
+
+def iter_chunks(path: Path) -> Iterator[Dict]:
+    """Chunks файла по одному, без загрузки файла целиком"""
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()  # заголовок
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Разбиение chunks по числу токенов модели embeddings
+
+Длина измеряется токенизатором Config.EMBEDDING_MODEL. Мелкие фрагменты
+(отдельная строка задания, заголовок параграфа) склеиваются с соседними,
+слишком длинные режутся на части с перекрытием — по границам строк, затем
+предложений, а в крайнем случае по токенам. Так chunks получаются сравнимой
+длины: в батчах embeddings меньше паддинга, а поиск точнее.
+"""
+
+import copy
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+from config import Config
+
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str):
+    """Токенизатор модели (загружается один раз на процесс)"""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name)
+
+class TokenChunker:
+    """
+    Приводит chunks страницы к длине от min_tokens до max_tokens
+    
+    Итоговый предел — min(max_tokens, предел модели) за вычетом
+    prefix_tokens: в текст для embedding кроме содержимого входят служебные
+    строки (предмет, класс, страница, тема и глава, а после содержимого —
+    формулы, даты, личности), и всё вместе должно поместиться в модель:
+    при нехватке обрезаются именно последние строки.
+    
+    Объект не держит токенизатор и передаётся в процессы пула как есть.
+    """
+    def __init__(
+        self,
+        model_name: str = Config.EMBEDDING_MODEL,
+        max_tokens: int = Config.MAX_CHUNK_SIZE,
+        min_tokens: int = Config.MIN_CHUNK_SIZE,
+        overlap: int = Config.CHUNK_OVERLAP,
+        prefix_tokens: int = Config.CHUNK_PREFIX_TOKENS
+    ):
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.overlap = overlap
+        self.prefix_tokens = prefix_tokens
+    
+    def settings(self) -> Dict:
+        """Параметры, от которых зависит результат (для кэша структурирования)"""
+        return {
+            'model': self.model_name,
+            'max_tokens': self.max_tokens,
+            'min_tokens': self.min_tokens,
+            'overlap': self.overlap,
+            'prefix_tokens': self.prefix_tokens
+        }
+    
+    @property
+    def tokenizer(self):
+        return get_tokenizer(self.model_name)
+    
+    @property
+    def limit(self) -> int:
+        """Наибольшее число токенов содержимого одного chunk'а"""
+        model_limit = self.tokenizer.model_max_length
+        return max(1, min(self.max_tokens, model_limit) - self.prefix_tokens)
+    
+    def count(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)['input_ids'])
+    
+    def fit(
+        self,
+        chunks: List[Dict],
+        annotate: Callable[[Dict], None],
+        separator: str = '\n\n'
+    ) -> List[Dict]:
+        """
+        Склеивает мелкие chunks и режет длинные
+        
+        Args:
+            chunks: Chunks страницы по порядку (текст — content['text'])
+            annotate: Пересчитывает поля, извлекаемые из текста (формулы,
+                даты), для изменившегося chunk'а
+            separator: Чем соединять тексты склеенных chunks
+        """
+        limit = self.limit
+        sized = [(chunk, self.count(chunk['content']['text'])) for chunk in chunks]
+        
+        result = []
+        for chunk, tokens in self._merge_small(sized, limit, separator, annotate):
+            if tokens <= limit:
+                result.append(chunk)
+            else:
+                result.extend(self._split(chunk, limit, annotate))
+        return result
+    
+    def _merge_small(
+        self,
+        sized: List[Tuple[Dict, int]],
+        limit: int,
+        separator: str,
+        annotate: Callable[[Dict], None]
+    ) -> List[Tuple[Dict, int]]:
+        """
+        Мелкий chunk присоединяется к следующему, последний — к предыдущему
+        
+        Склейка допустима, если результат не длиннее limit или сосед и так
+        будет разрезан (тогда мелкий фрагмент, например заголовок, попадёт
+        в первую или последнюю часть).
+        """
+        def can_join(first_tokens: int, second_tokens: int) -> bool:
+            return first_tokens + second_tokens <= limit or max(first_tokens, second_tokens) > limit
+        
+        merged = []  # [chunk, токенов, склеен ли]
+        for chunk, tokens in sized:
+            if merged and merged[-1][1] < self.min_tokens and can_join(merged[-1][1], tokens):
+                prev_chunk, prev_tokens, _ = merged[-1]
+                merged[-1] = [self._join(prev_chunk, chunk, separator), prev_tokens + tokens, True]
+            else:
+                merged.append([chunk, tokens, False])
+        
+        if len(merged) > 1 and merged[-1][1] < self.min_tokens and can_join(merged[-2][1], merged[-1][1]):
+            (prev_chunk, prev_tokens, _), (last_chunk, last_tokens, _) = merged[-2:]
+            merged[-2:] = [[self._join(prev_chunk, last_chunk, separator), prev_tokens + last_tokens, True]]
+        
+        for chunk, _, was_merged in merged:
+            if was_merged:
+                annotate(chunk)
+        return [(chunk, tokens) for chunk, tokens, _ in merged]
+    
+    @staticmethod
+    def _join(first: Dict, second: Dict, separator: str) -> Dict:
+        chunk = copy.deepcopy(first)
+        chunk['content']['text'] = first['content']['text'] + separator + second['content']['text']
+        
+        # Номера всех заданий, попавших в chunk: строка "1,2,3" — ChromaDB
+        # принимает в metadata только скаляры
+        if 'task_number' in first['metadata']:
+            numbers = [
+                str(meta.get('task_numbers', meta.get('task_number', '')))
+                for meta in (first['metadata'], second['metadata'])
+            ]
+            chunk['metadata']['task_numbers'] = ','.join(num for num in numbers if num)
+        return chunk
+    
+    def _split(self, chunk: Dict, limit: int, annotate: Callable[[Dict], None]) -> List[Dict]:
+        """Режет chunk на части не длиннее limit с перекрытием"""
+        pieces = self.split_text(chunk['content']['text'], limit)
+        
+        parts = []
+        for idx, text in enumerate(pieces, start=1):
+            part = copy.deepcopy(chunk)
+            part['content']['text'] = text
+            part['metadata']['fragment'] = idx
+            part['metadata']['fragments'] = len(pieces)
+            annotate(part)
+            parts.append(part)
+        return parts
+    
+    def split_text(self, text: str, limit: int) -> List[str]:
+        """
+        Делит текст на окна не длиннее limit токенов
+        
+        Окна собираются из целых строк (или предложений длинной строки);
+        следующее окно начинается с хвоста предыдущего длиной до overlap
+        токенов. Единица текста длиннее limit режется по токенам.
+        """
+        units = []
+        for line in text.split('\n'):
+            if self.count(line) <= limit:
+                units.append(line)
+                continue
+            for sentence in SENTENCE_END.split(line):
+                if self.count(sentence) <= limit:
+                    units.append(sentence)
+                else:
+                    units.extend(self._split_by_tokens(sentence, limit))
+        
+        windows = []
+        window = []  # [(текст, токенов)]
+        window_tokens = 0
+        for unit in units:
+            tokens = self.count(unit)
+            if window and window_tokens + tokens > limit:
+                windows.append(window)
+                
+                # Перекрытие: последние единицы окна, пока укладываемся в overlap
+                tail = []
+                tail_tokens = 0
+                for prev_unit, prev_tokens in reversed(window):
+                    if tail_tokens + prev_tokens > self.overlap or tail_tokens + prev_tokens + tokens > limit:
+                        break
+                    tail.insert(0, (prev_unit, prev_tokens))
+                    tail_tokens += prev_tokens
+                window, window_tokens = tail, tail_tokens
+            
+            window.append((unit, tokens))
+            window_tokens += tokens
+        if window:
+            windows.append(window)
+        
+        return ['\n'.join(unit for unit, _ in window).strip() for window in windows]
+    
+    def _split_by_tokens(self, text: str, limit: int) -> List[str]:
+        """Окна по limit токенов с шагом limit - overlap (границы — по символам токенов)"""
+        offsets = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )['offset_mapping']
+        step = max(1, limit - self.overlap)
+        
+        pieces = []
+        for start in range(0, len(offsets), step):
+            window = offsets[start:start + limit]
+            pieces.append(text[window[0][0]:window[-1][1]])
+            if start + limit >= len(offsets):
+                break
+        return pieces
\ No newline at end of file
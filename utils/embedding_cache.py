@@ -0,0 +1,144 @@
+"""
+Кэш embeddings с адресацией по содержимому
+
+Ключ — (модель, SHA-256 текста для embedding): chunk с тем же текстом не
+кодируется моделью повторно, даже если у него сменились ID, страница или
+коллекция ChromaDB пересоздана. Для каждой модели — отдельный каталог:
+
+    meta.json    {"model", "dim"}
+    keys.bin     SHA-256 текстов подряд, по 32 байта
+    vectors.f32  float32 (N, dim), строка i — embedding ключа i
+
+Оба файла только дописываются: сначала векторы, затем ключи, поэтому
+оборванная запись оставляет лишь хвост без ключа, который отбрасывается
+при следующем открытии. Векторы читаются через np.memmap — в памяти
+держится только индекс ключ -> строка.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_KEY_SIZE = 32
+
+def embedding_key(text: str) -> bytes:
+    """SHA-256 текста (32 байта)"""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+class EmbeddingCache:
+    """
+    Постоянный кэш embeddings одной модели
+    
+    get(keys) отдаёт найденные векторы и позиции промахов, put(keys,
+    vectors) дописывает новые. hits / misses считаются по ключам.
+    """
+    def __init__(self, cache_dir: Path, model_name: str):
+        self.model_name = model_name
+        self.path = cache_dir / re.sub(r'[^\w.-]+', '_', model_name)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._meta_path = self.path / 'meta.json'
+        self._keys_path = self.path / 'keys.bin'
+        self._vectors_path = self.path / 'vectors.f32'
+        
+        self.dim = None
+        self.index: Dict[bytes, int] = {}
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+        
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding='utf-8'))
+            if meta.get('model') == model_name:
+                self.dim = meta['dim']
+                self._load_index()
+    
+    def _load_index(self):
+        keys_size = self._keys_path.stat().st_size if self._keys_path.exists() else 0
+        vectors_size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        rows = min(keys_size // _KEY_SIZE, vectors_size // (4 * self.dim))
+        
+        # Хвост оборванной записи
+        for path, size, expected in (
+            (self._keys_path, keys_size, rows * _KEY_SIZE),
+            (self._vectors_path, vectors_size, rows * 4 * self.dim)
+        ):
+            if size != expected:
+                with open(path, 'r+b') as f:
+                    f.truncate(expected)
+        
+        keys = np.fromfile(self._keys_path, dtype=np.uint8).reshape(rows, _KEY_SIZE) if rows else []
+        self.index = {key.tobytes(): row for row, key in enumerate(keys)}
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def _matrix(self) -> np.ndarray:
+        """(N, dim) векторы на mmap, переоткрываются после дописывания"""
+        if self._vectors is None or len(self._vectors) != len(self.index):
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode='r', shape=(len(self.index), self.dim)
+            )
+        return self._vectors
+    
+    def get(self, keys: List[bytes]) -> Tuple[np.ndarray | None, List[int]]:
+        """
+        Векторы по ключам
+        
+        Returns:
+            (vectors, missing): vectors (len(keys), dim) float32, строки
+            промахов не заполнены (None, если кэш ещё пуст); missing —
+            позиции ключей, которых нет в кэше
+        """
+        rows = [self.index.get(key, -1) for key in keys]
+        missing = [idx for idx, row in enumerate(rows) if row < 0]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        
+        if self.dim is None:
+            return None, missing
+        
+        vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+        found = np.asarray([idx for idx, row in enumerate(rows) if row >= 0], dtype=np.int64)
+        if len(found):
+            vectors[found] = self._matrix()[np.asarray(rows)[found]]
+        return vectors, missing
+    
+    def put(self, keys: List[bytes], vectors: np.ndarray):
+        """Дописывает векторы новых ключей (уже известные и повторы пропускаются)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._meta_path.write_text(
+                json.dumps({'model': self.model_name, 'dim': self.dim}, ensure_ascii=False),
+                encoding='utf-8'
+            )
+            for path in (self._keys_path, self._vectors_path):
+                path.unlink(missing_ok=True)
+        
+        new_rows = {}
+        for idx, key in enumerate(keys):
+            if key not in self.index and key not in new_rows:
+                new_rows[key] = idx
+        if not new_rows:
+            return
+        
+        with open(self._vectors_path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors[list(new_rows.values())]).tobytes())
+        with open(self._keys_path, 'ab') as f:
+            f.write(b''.join(new_rows))
+        
+        for key in new_rows:
+            self.index[key] = len(self.index)
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.index)
+        }
\ No newline at end of file
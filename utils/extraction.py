@@ -0,0 +1,68 @@
+"""
+Скомпилированные шаблоны извлечения для ChunkCreator
+
+Шаблоны компилируются один раз при импорте. Даты и имена ищутся одним
+проходом по абзацу: у них не пересекаются первые символы (цифра и
+заглавная буква), поэтому объединённый шаблон находит ровно то же,
+что два отдельных re.findall.
+"""
+
+import re
+from typing import List, Tuple
+
+# Задание: "12. Текст..." до следующего номера в начале строки или конца текста
+TASK_PATTERN = re.compile(r'(\d+)\.\s+(.*?)(?=\n\d+\.|$)', re.DOTALL)
+
+# Формула: выражение с "=". Исходный вид шаблона —
+#   [a-zа-я0-9\s\+\-\*\/\(\)]+\s*=\s*[a-zа-я0-9\s\+\-\*\/\(\)]+
+# \s уже входит в класс, поэтому \s* вокруг "=" ничего не меняют, а совпадение
+# может начинаться только в начале серии символов класса. Ограничение
+# (?<!...) и захватывающие квантификаторы дают те же совпадения без
+# квадратичного перебора на длинном тексте без "="
+_FORMULA_CHARS = r'[a-zа-я0-9\s\+\-\*\/\(\)]'
+FORMULA_PATTERN = re.compile(
+    rf'(?<!{_FORMULA_CHARS}){_FORMULA_CHARS}++={_FORMULA_CHARS}++',
+    re.IGNORECASE
+)
+
+# Даты ("1812 г.", "1941–1945 гг.") и имена (два слова с заглавной буквы).
+# Опережающая проверка первого символа позволяет движку быстро пропускать
+# позиции, с которых не может начаться ни дата, ни имя
+FACTS_PATTERN = re.compile(
+    r'(?=[\dА-ЯЁ])(?:'
+    r'(?P<date>\b\d{1,4}\s*г\.?|\b\d{1,4}[-–]\d{1,4}\s*гг\.?)'
+    r'|(?P<name>\b[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+)'
+    r')'
+)
+
+def split_tasks(page_text: str) -> List[Tuple[str, str]]:
+    """Задания страницы: [(номер, текст)]"""
+    return TASK_PATTERN.findall(page_text)
+
+def leading_text(page_text: str) -> str:
+    """Текст до первого задания (продолжение задания с прошлой страницы)"""
+    match = TASK_PATTERN.search(page_text)
+    return (page_text[:match.start()] if match else page_text).strip()
+
+def find_formulas(text: str) -> List[str]:
+    """Выражения с "=" (без пробелов по краям)"""
+    if '=' not in text:
+        return []
+    return [match.group().strip() for match in FORMULA_PATTERN.finditer(text)]
+
+def scan_facts(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Даты и имена за один проход
+    
+    Returns:
+        (dates, names): даты по порядку появления, имена без повторов
+        (порядок первого появления)
+    """
+    dates = []
+    names = {}
+    for date, name in FACTS_PATTERN.findall(text):
+        if date:
+            dates.append(date)
+        else:
+            names[name] = None
+    return dates, list(names)
\ No newline at end of file
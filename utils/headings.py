@@ -0,0 +1,200 @@
+"""
+Главы и темы учебника по заголовкам на страницах
+
+Заголовок — строка, набранная крупнее основного текста страницы: высота
+bbox её слов заметно больше медианной. "§ 6", "Глава 2", "Раздел II"
+открывают главу, остальные заголовки ("34. Сокращение дробей") — тему.
+Размер шрифта сам по себе главу не открывает. Обложка и титул (строка
+крупнее Config.HEADING_COVER_RATIO) и страница оглавления заголовков не дают.
+
+Заголовки находятся в worker-процессах вместе с chunks страницы и
+вставляются в её список chunks маркерами {'heading': {...}} — по месту в
+тексте. Так они попадают в кэш страниц и не требуют повторного разбора.
+TopicTracker в основном процессе проходит страницы по порядку, убирает
+маркеры и проставляет chunks metadata['chapter'] и ['topic'].
+"""
+
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from config import Config
+from .ocr_normalize import normalize_text
+from .reading_order import boxes_from_results, reading_order
+
+# "Глава 2", "Раздел II" или "§ 6"; знак § OCR часто читает как "$",
+# "S", "з", "Co?" — такие варианты перед номером тоже считаются знаком §
+CHAPTER_PATTERN = re.compile(
+    r'^(?:(?:глава|раздел)\s+(\d+|[IVXLC]+)\b|(?:§|\$|[Sз]|[СC][оo]\W?)\s*(\d{1,2})\b)',
+    re.IGNORECASE
+)
+# Нумерованная тема (урок): "34. Сокращение дробей"
+TOPIC_NUMBER_PATTERN = re.compile(r'^\d{1,3}\.\s*\D')
+# Заголовок страницы оглавления (OCR может потерять первую букву)
+TOC_PATTERN = re.compile(r'^(?:с|c)?одержание$|^оглавление$', re.IGNORECASE)
+# Строка, с которой начинается новый заголовок, а не продолжение предыдущего
+HEADING_START_PATTERN = re.compile(r'^(?:§|глава\b|раздел\b)', re.IGNORECASE)
+# Слово из трёх и более букв с гласной: отсекает крупный шум ("шшдшршшш")
+WORD_WITH_VOWEL = re.compile(r'(?=[^\W\d_]*[аеёиоуыэюяaeiouy])[^\W\d_]{3,}', re.IGNORECASE)
+ROMAN = {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100}
+
+def roman_to_int(numeral: str) -> int:
+    values = [ROMAN[char] for char in numeral.upper()]
+    return sum(-value if value < next_value else value for value, next_value in zip(values, values[1:] + [0]))
+
+def classify_heading(title: str) -> Dict:
+    """
+    {'level': 'chapter' | 'topic', 'title', 'number', 'numbered'} для строки заголовка
+    
+    numbered — тема с номером урока ("34. ...")
+    """
+    match = CHAPTER_PATTERN.match(title)
+    if match:
+        number = match.group(1) or match.group(2)
+        return {
+            'level': 'chapter',
+            'title': title,
+            'number': int(number) if number.isdigit() else roman_to_int(number)
+        }
+    return {
+        'level': 'topic',
+        'title': title,
+        'number': None,
+        'numbered': bool(TOPIC_NUMBER_PATTERN.match(title))
+    }
+
+def detect_headings(ocr_results: List[Dict], normalize: bool = False) -> List[Dict]:
+    """
+    Заголовки страницы в порядке чтения
+    
+    Высота строки — средняя высота bbox её слов; строка — заголовок, если
+    она выше медианной высоты слов страницы в Config.HEADING_HEIGHT_RATIO
+    раз, короче Config.HEADING_MAX_CHARS и содержит слово. Соседние строки
+    одного абзаца и близкой высоты объединяются в один заголовок, если
+    следующая не начинается с "§" или "Глава". normalize — чистить текст
+    заголовка так же, как текст страницы (utils.ocr_normalize).
+    
+    Обложка и титул (слово выше основного текста в
+    Config.HEADING_COVER_RATIO раз) и оглавление ("Содержание") заголовков
+    не дают: их строки — названия книги и чужих глав.
+    """
+    if not ocr_results:
+        return []
+    
+    boxes = boxes_from_results(ocr_results)
+    heights = boxes[:, 3] - boxes[:, 1]
+    body_height = max(float(np.median(heights)), 1.0)
+    if heights.max() >= Config.HEADING_COVER_RATIO * body_height:
+        return []
+    
+    order, line_ids, paragraph_ids = reading_order(boxes)
+    line_starts = np.flatnonzero(np.diff(line_ids, prepend=-1))
+    line_heights = np.add.reduceat(heights[order], line_starts) / np.diff(line_starts, append=len(order))
+    ratios = line_heights / body_height
+    
+    headings = []
+    prev_paragraph = None
+    for line_idx, start in enumerate(line_starts.tolist()):
+        if ratios[line_idx] < Config.HEADING_HEIGHT_RATIO:
+            prev_paragraph = None
+            continue
+        
+        end = line_starts[line_idx + 1] if line_idx + 1 < len(line_starts) else len(order)
+        text = ' '.join(ocr_results[idx]['text'] for idx in order[start:end].tolist()).strip()
+        paragraph = int(paragraph_ids[start])
+        if (
+            headings
+            and paragraph == prev_paragraph
+            and abs(ratios[line_idx] - headings[-1]['ratio']) <= 0.2 * headings[-1]['ratio']
+            and not HEADING_START_PATTERN.match(text)
+            and not CHAPTER_PATTERN.match(text)
+        ):
+            headings[-1]['title'] += ' ' + text
+            headings[-1]['ratio'] = max(headings[-1]['ratio'], float(ratios[line_idx]))
+        else:
+            headings.append({'title': text, 'ratio': float(ratios[line_idx])})
+        prev_paragraph = paragraph
+    
+    result = []
+    for heading in headings:
+        title = normalize_text([heading['title']]) if normalize else heading['title']
+        if TOC_PATTERN.match(title.strip(' .:')):
+            return []
+        if len(title) <= Config.HEADING_MAX_CHARS and WORD_WITH_VOWEL.search(title):
+            result.append(classify_heading(title))
+    return result
+
+def insert_heading_markers(chunks: List[Dict], headings: List[Dict], page_text: str) -> List[Dict]:
+    """
+    Вставляет маркеры заголовков между chunks страницы
+    
+    Место определяется по положению в тексте страницы: заголовок встаёт
+    перед первым chunk'ом, начинающимся не раньше него. Порядок chunks не
+    меняется; заголовок, не найденный в тексте, считается стоящим в
+    начале страницы.
+    """
+    if not headings:
+        return chunks
+    
+    heading_positions = sorted(
+        (max(page_text.find(heading['title']), 0), idx) for idx, heading in enumerate(headings)
+    )
+    
+    result = []
+    next_heading = 0
+    position = 0
+    for chunk in chunks:
+        position = max(position, page_text.find(chunk['content']['text'][:40]))
+        while next_heading < len(heading_positions) and heading_positions[next_heading][0] <= position:
+            result.append({'heading': headings[heading_positions[next_heading][1]]})
+            next_heading += 1
+        result.append(chunk)
+    
+    result.extend({'heading': headings[idx]} for _, idx in heading_positions[next_heading:])
+    return result
+
+class TopicTracker:
+    """
+    Текущие глава и тема при проходе страниц учебника по порядку
+    
+    Ненумерованные темы до первой главы или нумерованной темы — титульные
+    страницы и аннотация (авторы, издательство) — пропускаются.
+    """
+    def __init__(self):
+        self.chapter = 0
+        self.chapter_title = None
+        self.topic = None
+        self.headings_seen = 0
+        self._started = False
+    
+    def assign(self, chunks: List[Dict]) -> List[Dict]:
+        """Убирает маркеры заголовков и проставляет chunks главу и тему"""
+        result = []
+        for item in chunks:
+            heading = item.get('heading')
+            if heading is not None:
+                self._enter(heading)
+                continue
+            
+            if self.chapter:
+                item['metadata']['chapter'] = self.chapter
+                item['metadata']['chapter_title'] = self.chapter_title
+            if self.topic:
+                item['metadata']['topic'] = self.topic
+            result.append(item)
+        return result
+    
+    def _enter(self, heading: Dict):
+        if heading['level'] == 'chapter' or heading.get('numbered'):
+            self._started = True
+        if not self._started:
+            return
+        
+        self.headings_seen += 1
+        if heading['level'] == 'chapter':
+            self.chapter = heading['number'] or self.chapter + 1
+            self.chapter_title = heading['title']
+            self.topic = None
+        else:
+            self.topic = heading['title']
\ No newline at end of file
@@ -0,0 +1,64 @@
+from typing import Dict, List
+import numpy as np
+
+# Типы областей, в которых есть смысл искать строки текста. Картинки
+# (figure) не распознаются вовсе
+TEXT_REGION_TYPES = {
+    'text', 'title', 'list', 'table', 'equation',
+    'header', 'footer', 'reference', 'figure_caption', 'table_caption'
+}
+
+def detect_regions(layout_engine, img_array: np.ndarray, min_score: float = 0.5) -> List[Dict]:
+    """
+    Находит области страницы детектором разметки PP-Structure
+    
+    Returns:
+        List[Dict]: [{'type': str, 'bbox': [x1, y1, x2, y2], 'score': float}]
+            в порядке сверху вниз, слева направо
+    """
+    layout_res, _ = layout_engine.layout_predictor(img_array)
+    
+    regions = []
+    for region in layout_res:
+        score = float(region.get('score', 1.0))
+        if score < min_score:
+            continue
+        x1, y1, x2, y2 = (float(coord) for coord in region['bbox'])
+        regions.append({'type': region['label'], 'bbox': [x1, y1, x2, y2], 'score': score})
+    
+    regions.sort(key=lambda region: (region['bbox'][1], region['bbox'][0]))
+    return regions
+
+def crop_region(img_array: np.ndarray, bbox: List[float], padding: int = 8):
+    """
+    Вырезает область с небольшим запасом по краям
+    
+    Returns:
+        (crop, (x0, y0)): view на изображение и смещение его левого верхнего угла
+    """
+    height, width = img_array.shape[:2]
+    x0 = max(0, int(bbox[0]) - padding)
+    y0 = max(0, int(bbox[1]) - padding)
+    x1 = min(width, int(np.ceil(bbox[2])) + padding)
+    y1 = min(height, int(np.ceil(bbox[3])) + padding)
+    return img_array[y0:y1, x0:x1], (x0, y0)
+
+def page_text_by_regions(page_data: Dict, skip_types=('header', 'footer')) -> str:
+    """
+    Текст страницы с учётом разметки
+    
+    Строки группируются по областям (в порядке областей), области
+    разделяются пустой строкой, колонтитулы отбрасываются. Для страниц
+    без разметки возвращается обычный page_data['text'].
+    """
+    ocr_results = page_data.get('ocr_results', [])
+    if not page_data.get('regions') or not any('region_id' in line for line in ocr_results):
+        return page_data['text']
+    
+    blocks: Dict[int, List[str]] = {}
+    for line in ocr_results:
+        if line.get('region') in skip_types:
+            continue
+        blocks.setdefault(line.get('region_id', -1), []).append(line['text'])
+    
+    return '\n\n'.join('\n'.join(blocks[region_id]) for region_id in sorted(blocks))
\ No newline at end of file
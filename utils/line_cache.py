@@ -0,0 +1,79 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Tuple
+import cv2
+import numpy as np
+
+class LineCropCache:
+    """
+    Кэш распознанных строк с адресацией по содержимому
+    
+    Ключ — размер вырезанной строки и хэш её бинаризованной (Otsu) копии в
+    исходном разрешении. Повторяющиеся на каждой странице колонтитулы,
+    номера страниц и рамки с инструкциями после первого распознавания
+    берутся из кэша без запуска модели. Ключ точный: строки, различающиеся
+    хотя бы одной цифрой, не совпадают (уменьшенный перцептивный хэш
+    путал "45 + 37" и "45 + 57").
+    Хранится не больше max_entries строк (вытесняются давно не использованные).
+    """
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, Tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def key(self, crop: np.ndarray) -> bytes:
+        """Размер строки + BLAKE2b её бинаризованных пикселей"""
+        gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        digest = hashlib.blake2b(np.packbits(binary).tobytes(), digest_size=16).digest()
+        return height.to_bytes(4, 'little') + width.to_bytes(4, 'little') + digest
+    
+    def get(self, key: bytes) -> Tuple[str, float] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: bytes, text: str, confidence: float):
+        self._entries[key] = (text, confidence)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries)
+        }
+
+def merge_cache_stats(total: Dict, stats: Dict) -> Dict:
+    """Суммирует статистику кэшей нескольких процессов"""
+    hits = total.get('hits', 0) + stats['hits']
+    misses = total.get('misses', 0) + stats['misses']
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': total.get('entries', 0) + stats['entries']
+    }
+
+def diff_cache_stats(after: Dict, before: Dict | None) -> Dict:
+    """Статистика кэша за промежуток между двумя снимками stats()"""
+    before = before or {}
+    hits = after['hits'] - before.get('hits', 0)
+    misses = after['misses'] - before.get('misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': after['entries'] - before.get('entries', 0)
+    }
\ No newline at end of file
@@ -0,0 +1,166 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from tqdm import tqdm
+
+from .ocr_handler import _process_shard, _warm_up_worker
+from .ocr_manifest import OCRManifest
+from .line_cache import merge_cache_stats
+from .pdf_processor import RenderPolicy
+from .timing import TimingLog
+
+class BookJob:
+    """
+    Учебник в пакетной обработке: страницы, разбитые на задачи пула,
+    и состояние прогона (сводки страниц, статистика, время)
+    """
+    def __init__(
+        self,
+        pdf_path: Path,
+        metadata,
+        output_dir: Path,
+        pages: List[int],
+        page_range: range,
+        manifest: OCRManifest,
+        timing_log: TimingLog,
+        shard_pages: int,
+        priority: int = 0,
+        order: int = 0
+    ):
+        self.pdf_path = pdf_path
+        self.metadata = metadata
+        self.output_dir = output_dir
+        self.page_range = page_range
+        self.manifest = manifest
+        self.timing_log = timing_log
+        self.priority = priority
+        self.order = order
+        
+        self.shards = [pages[i:i + shard_pages] for i in range(0, len(pages), shard_pages)]
+        self.total_pages = len(pages)
+        self.next_shard = 0
+        self.in_flight = 0
+        self.pages_submitted = 0
+        self.summaries: List[Dict] = []
+        self.run_stats: Dict = {}
+        self.started: float | None = None
+    
+    @property
+    def has_pending(self) -> bool:
+        return self.next_shard < len(self.shards)
+    
+    @property
+    def is_done(self) -> bool:
+        return not self.has_pending and self.in_flight == 0
+    
+    def take_shard(self) -> List[int]:
+        shard = self.shards[self.next_shard]
+        self.next_shard += 1
+        self.in_flight += 1
+        self.pages_submitted += len(shard)
+        if self.started is None:
+            self.started = time.perf_counter()
+        return shard
+
+def pick_next_job(jobs: List[BookJob]) -> BookJob | None:
+    """
+    Выбирает книгу для следующей задачи пула
+    
+    Сначала — наибольший приоритет. Среди книг одного приоритета
+    справедливое деление: меньше задач в работе, затем меньше уже
+    отправленных страниц, затем порядок в каталоге.
+    """
+    candidates = [job for job in jobs if job.has_pending]
+    if not candidates:
+        return None
+    return min(
+        candidates,
+        key=lambda job: (-job.priority, job.in_flight, job.pages_submitted, job.order)
+    )
+
+def run_book_jobs(
+    jobs: List[BookJob],
+    num_workers: int,
+    handler_kwargs: Dict,
+    render_policy: RenderPolicy,
+    use_native_text: bool,
+    on_book_done: Callable[[BookJob, float], None],
+    queue_depth: int = 2
+):
+    """
+    Распознаёт все книги одним пулом процессов
+    
+    В пуле одновременно не больше num_workers * queue_depth задач, поэтому
+    очередность (pick_next_job) решается в момент освобождения места, а не
+    заранее для всего каталога. Как только у книги завершается последняя
+    задача, вызывается on_book_done(job, elapsed) — например, чтобы
+    записать summary.json, не дожидаясь остальных книг.
+    """
+    for job in jobs:
+        if job.is_done:
+            on_book_done(job, 0.0)
+    
+    active = [job for job in jobs if not job.is_done]
+    if not active:
+        return
+    
+    # Делим потоки CPU между процессами, чтобы не было переподписки
+    cpu_threads = max(1, (os.cpu_count() or 1) // max(1, num_workers))
+    engine_kwargs = {
+        'lang': handler_kwargs['lang'],
+        'use_gpu': handler_kwargs['use_gpu'],
+        'cpu_threads': cpu_threads,
+        'rec_batch_size': handler_kwargs['rec_batch_size']
+    }
+    handler_kwargs = {**handler_kwargs, 'cpu_threads': cpu_threads}
+    
+    total_pages = sum(job.total_pages for job in active)
+    futures = {}
+    
+    def submit_next(executor) -> bool:
+        job = pick_next_job(active)
+        if job is None:
+            return False
+        shard = job.take_shard()
+        future = executor.submit(
+            _process_shard, job.pdf_path, shard, job.output_dir, render_policy,
+            handler_kwargs, use_native_text, job.timing_log
+        )
+        futures[future] = job
+        return True
+    
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_warm_up_worker,
+        initargs=(engine_kwargs,)
+    ) as executor:
+        while len(futures) < num_workers * queue_depth and submit_next(executor):
+            pass
+        
+        with tqdm(total=total_pages, desc=f"OCR каталога ({num_workers} workers)") as pbar:
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    shard_summaries, cache_stats = future.result()
+                    job.in_flight -= 1
+                    job.summaries.extend(shard_summaries)
+                    
+                    if cache_stats is not None:
+                        job.run_stats['line_cache'] = merge_cache_stats(
+                            job.run_stats.get('line_cache', {}), cache_stats
+                        )
+                    
+                    for page_summary in shard_summaries:
+                        job.manifest.mark_done(page_summary['page'], page_summary)
+                    job.manifest.save()
+                    pbar.update(len(shard_summaries))
+                    
+                    if job.is_done:
+                        job.summaries.sort(key=lambda page: page['page'])
+                        on_book_done(job, time.perf_counter() - job.started)
+                    
+                    submit_next(executor)
\ No newline at end of file
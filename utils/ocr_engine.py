@@ -0,0 +1,78 @@
+from paddleocr import PaddleOCR, PPStructure
+import numpy as np
+import threading
+from typing import Dict, Tuple
+
+# Реестр движков на процесс: модели грузятся один раз и переиспользуются
+# всеми OCRHandler'ами (и всеми задачами долгоживущего worker-процесса)
+_engines: Dict[Tuple, PaddleOCR] = {}
+_layout_engines: Dict[Tuple, PPStructure] = {}
+_engines_lock = threading.Lock()
+
+def get_ocr_engine(
+    lang: str = 'ru',
+    use_gpu: bool = False,
+    cpu_threads: int | None = None,
+    rec_batch_size: int = 16
+) -> PaddleOCR:
+    """
+    Возвращает закэшированный движок PaddleOCR, загружая модели при первом вызове
+    
+    Классификатор угла загружается всегда (он маленький), а используется
+    ли он — решает OCRHandler для каждой книги.
+    """
+    key = (lang, use_gpu, cpu_threads, rec_batch_size)
+    
+    with _engines_lock:
+        if key not in _engines:
+            kwargs = {}
+            if cpu_threads is not None:
+                kwargs['cpu_threads'] = cpu_threads
+            
+            _engines[key] = PaddleOCR(
+                use_angle_cls=True,
+                lang=lang,
+                use_gpu=use_gpu,
+                show_log=False,
+                rec_batch_num=rec_batch_size,
+                **kwargs
+            )
+        return _engines[key]
+
+def get_layout_engine(lang: str = 'en', use_gpu: bool = False) -> PPStructure:
+    """
+    Возвращает закэшированную модель анализа разметки страницы
+    
+    Загружается только детектор layout (без OCR и таблиц) — распознавание
+    делает обычный движок из get_ocr_engine.
+    """
+    key = (lang, use_gpu)
+    
+    with _engines_lock:
+        if key not in _layout_engines:
+            _layout_engines[key] = PPStructure(
+                layout=True,
+                table=False,
+                ocr=False,
+                lang=lang,
+                use_gpu=use_gpu,
+                show_log=False
+            )
+        return _layout_engines[key]
+
+def warm_up_engine(engine: PaddleOCR):
+    """
+    Прогоняет через модели пустую картинку и строку, чтобы инициализация
+    predictor'ов не ложилась на первую страницу
+    """
+    blank_page = np.full((64, 256, 3), 255, dtype=np.uint8)
+    engine.text_detector(blank_page)
+    blank_line = np.full((48, 192, 3), 255, dtype=np.uint8)
+    engine.text_classifier([blank_line])
+    engine.text_recognizer([blank_line])
+
+def clear_ocr_engines():
+    """Выгружает все движки (например, перед сменой конфигурации)"""
+    with _engines_lock:
+        _engines.clear()
+        _layout_engines.clear()
\ No newline at end of file
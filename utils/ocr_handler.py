@@ -1,24 +1,121 @@
-from paddleocr import PaddleOCR
+from .ocr_engine import get_ocr_engine, get_layout_engine, warm_up_engine
+# Модули tools/ поставляются внутри paddleocr и доступны после его импорта
+from tools.infer.predict_system import sorted_boxes
+from tools.infer.utility import get_rotate_crop_image, get_minarea_rect_crop
 from PIL import Image
+import cv2
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator
+from collections import OrderedDict
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import json
+import os
+import queue
+import threading
+import time
 from tqdm import tqdm
 
+from .pdf_processor import PDFProcessor, RenderPolicy, is_text_layer_usable
+from .ocr_manifest import OCRManifest
+from .line_cache import LineCropCache, diff_cache_stats, merge_cache_stats
+from .layout import TEXT_REGION_TYPES, detect_regions, crop_region
+from .reading_order import page_text
+from .timing import StageTimer, TimingLog
+
 class OCRHandler:
-    def __init__(self, lang='ru', use_gpu=False):
-        self.ocr = PaddleOCR(
-            use_angle_cls=True,
-            lang=lang,
-            use_gpu=use_gpu,
-            show_log=False
-        )
+    def __init__(
+        self,
+        lang='ru',
+        use_gpu=False,
+        cpu_threads: int | None = None,
+        rec_batch_size: int = 16,
+        page_batch_size: int = 4,
+        use_angle_cls: bool | None = None,
+        line_cache_size: int = 50000,
+        use_layout: bool = False,
+        layout_lang: str = 'en'
+    ):
+        """
+        Модели не загружаются в конструкторе: движок берётся из реестра
+        (utils.ocr_engine) при первом обращении к self.ocr.
+        
+        Args:
+            rec_batch_size: Размер батча строк для модели распознавания
+            page_batch_size: Сколько страниц конвейер отдаёт в process_images за раз
+            use_angle_cls: Классификатор угла поворота строк.
+                None — решить по пробе на первых распознанных строках книги
+            line_cache_size: Размер кэша повторяющихся строк (0 — без кэша)
+            use_layout: Предварительный анализ разметки: строки ищутся только
+                в текстовых областях (картинки пропускаются), типы областей
+                сохраняются в результатах
+            layout_lang: Язык модели разметки PP-Structure ('en' или 'ch')
+        """
+        self._engine_kwargs = {
+            'lang': lang,
+            'use_gpu': use_gpu,
+            'cpu_threads': cpu_threads,
+            'rec_batch_size': rec_batch_size
+        }
+        self._ocr = None
+        self._layout = None
+        self.use_layout = use_layout
+        self.layout_lang = layout_lang
+        self.page_batch_size = max(1, page_batch_size)
+        self.use_angle_cls = use_angle_cls
+        self.line_cache = LineCropCache(line_cache_size) if line_cache_size > 0 else None
+    
+    @property
+    def ocr(self):
+        """Движок PaddleOCR (загружается лениво, один на процесс)"""
+        if self._ocr is None:
+            self._ocr = get_ocr_engine(**self._engine_kwargs)
+        return self._ocr
+    
+    @property
+    def layout(self):
+        """Модель разметки страницы (загружается лениво)"""
+        if self._layout is None:
+            self._layout = get_layout_engine(
+                lang=self.layout_lang, use_gpu=self._engine_kwargs['use_gpu']
+            )
+        return self._layout
+    
+    def line_cache_stats(self) -> Dict | None:
+        """Статистика кэша строк (None, если кэш выключен)"""
+        return self.line_cache.stats() if self.line_cache is not None else None
     
-    def process_image(self, image: Image.Image) -> List[Dict]:
+    def warm_up(self):
+        """Загружает модели заранее и прогревает их на пустом изображении"""
+        warm_up_engine(self.ocr)
+    
+    def is_upright(
+        self,
+        crops: List[np.ndarray],
+        sample_size: int = 64,
+        max_flipped_ratio: float = 0.05
+    ) -> bool:
+        """
+        Проба ориентации: классифицирует выборку строк и проверяет,
+        что перевёрнутых среди них почти нет
+        """
+        step = max(1, len(crops) // sample_size)
+        sample = crops[::step][:sample_size]
+        if not sample:
+            return True
+        
+        _, cls_res, _ = self.ocr.text_classifier(list(sample))
+        cls_thresh = self.ocr.args.cls_thresh
+        flipped = sum(1 for label, score in cls_res if '180' in label and score >= cls_thresh)
+        return flipped / len(sample) <= max_flipped_ratio
+    
+    def process_image(self, image: Image.Image | np.ndarray) -> List[Dict]:
         """
         Обрабатывает изображение и возвращает распознанный текст
         
+        Принимает PIL Image или готовый numpy-массив (например, из
+        PDFProcessor.extract_page_as_array) — массив используется без копирования.
+        
         Returns:
             List[Dict]: [{
                 'bbox': [[x1,y1], [x2,y2], [x3,y3], [x4,y4]],
@@ -26,75 +123,703 @@ class OCRHandler:
                 'confidence': float
             }]
         """
-        # Конвертируем PIL Image в numpy array
-        img_array = np.array(image)
+        return self.process_images([image])[0]
+    
+    def process_images(self, images: List[Image.Image | np.ndarray]) -> List[List[Dict]]:
+        """
+        Распознаёт несколько изображений с общим проходом распознавания
         
-        # OCR
-        result = self.ocr.ocr(img_array, cls=True)
+        Returns:
+            List[List[Dict]]: результаты в формате process_image, по порядку images
+        """
+        return [page['ocr_results'] for page in self.analyze_images(images)]
+    
+    def analyze_images(self, images: List[Image.Image | np.ndarray]) -> List[Dict]:
+        """
+        Разметка + детекция + распознавание для нескольких изображений
         
-        if result is None or len(result) == 0:
-            return []
+        Детекция строк выполняется для каждой страницы (при use_layout —
+        только внутри текстовых областей), а вырезанные строки всех страниц
+        идут в классификатор угла и распознаватель одним списком: PaddleOCR
+        сортирует их по соотношению сторон и гоняет батчами по
+        rec_batch_size, так что батчи полные и почти без паддинга.
+        
+        Returns:
+            List[Dict]: [{
+                'ocr_results': List[Dict] (при разметке у строк есть
+                    'region' — тип области и 'region_id' — её индекс),
+                'regions': List[Dict] | None,
+                'timings': {'detect': с, 'recognize': с}
+            }] по порядку images. Время распознавания общего списка строк
+            делится между страницами пропорционально числу их строк.
+        """
+        crops = []
+        owners = []  # (номер изображения, bbox, индекс области) для каждой строки
+        results = []
+        
+        for idx, image in enumerate(images):
+            started = time.perf_counter()
+            img_array = _to_ocr_array(image)
+            
+            boxes, regions = self._detect_lines(img_array)
+            results.append({'ocr_results': [], 'regions': regions, 'timings': {}})
+            
+            for box, region_id in boxes:
+                crops.append(self._crop_line(img_array, box))
+                owners.append((idx, box, region_id))
+            results[idx]['timings']['detect'] = time.perf_counter() - started
+        
+        if not crops:
+            return results
+        
+        started = time.perf_counter()
+        if self.use_angle_cls is None:
+            # Решение принимается один раз на книгу (на этот OCRHandler)
+            self.use_angle_cls = not self.is_upright(crops)
+        
+        rec_res = self._recognize_crops(crops)
+        
+        rec_elapsed = time.perf_counter() - started
+        lines_per_image = np.bincount([idx for idx, _, _ in owners], minlength=len(images))
+        for idx, count in enumerate(lines_per_image):
+            results[idx]['timings']['recognize'] = rec_elapsed * count / len(crops)
         
         # Парсим результаты
-        parsed_results = []
-        for line in result[0]:
-            bbox = line[0]
-            text_info = line[1]
+        for (idx, box, region_id), (text, score) in zip(owners, rec_res):
+            if score < self.ocr.drop_score:
+                continue
             
-            parsed_results.append({
-                'bbox': bbox,
-                'text': text_info[0],
-                'confidence': float(text_info[1])
-            })
+            line = {
+                'bbox': box.tolist(),
+                'text': text,
+                'confidence': float(score)
+            }
+            if region_id is not None:
+                line['region'] = results[idx]['regions'][region_id]['type']
+                line['region_id'] = region_id
+            results[idx]['ocr_results'].append(line)
+        
+        return results
+    
+    def _detect_lines(self, img_array: np.ndarray):
+        """
+        Находит строки на странице
+        
+        Returns:
+            (boxes, regions): boxes — [(bbox, индекс области | None)],
+            regions — области разметки (None, если разметка выключена)
+        """
+        if not self.use_layout:
+            return [(box, None) for box in self._detect_boxes(img_array)], None
         
-        return parsed_results
+        regions = detect_regions(self.layout, img_array)
+        if not regions:
+            # Разметка ничего не нашла — ищем строки по всей странице
+            return [(box, None) for box in self._detect_boxes(img_array)], regions
+        
+        boxes = []
+        for region_id, region in enumerate(regions):
+            if region['type'] not in TEXT_REGION_TYPES:
+                continue
+            
+            crop, (x0, y0) = crop_region(img_array, region['bbox'])
+            for box in self._detect_boxes(np.ascontiguousarray(crop)):
+                boxes.append((box + np.array([x0, y0], dtype=box.dtype), region_id))
+        
+        return boxes, regions
+    
+    def _detect_boxes(self, img_array: np.ndarray) -> List[np.ndarray]:
+        dt_boxes, _ = self.ocr.text_detector(img_array)
+        if dt_boxes is None or len(dt_boxes) == 0:
+            return []
+        return sorted_boxes(dt_boxes)
+    
+    def _recognize_crops(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """
+        Классификация угла + распознавание строк с учётом кэша
+        
+        Строки, уже встречавшиеся в книге, берутся из кэша; одинаковые
+        строки внутри батча распознаются один раз.
+        """
+        if self.line_cache is None:
+            return self._run_recognition(crops)
+        
+        keys = [self.line_cache.key(crop) for crop in crops]
+        
+        # Уникальные промахи: key -> индекс первой такой строки. Повтор
+        # строки внутри батча не распознаётся — считается попаданием
+        rec_res = []
+        misses = {}
+        for idx, key in enumerate(keys):
+            if key in misses:
+                self.line_cache.hits += 1
+                rec_res.append(None)
+                continue
+            cached = self.line_cache.get(key)
+            if cached is None:
+                misses[key] = idx
+            rec_res.append(cached)
+        
+        recognized = {}
+        if misses:
+            miss_res = self._run_recognition([crops[idx] for idx in misses.values()])
+            for key, (text, score) in zip(misses, miss_res):
+                recognized[key] = (text, score)
+                self.line_cache.put(key, text, score)
+        
+        return [
+            cached if cached is not None else recognized[key]
+            for key, cached in zip(keys, rec_res)
+        ]
+    
+    def _run_recognition(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        if self.use_angle_cls:
+            crops, _, _ = self.ocr.text_classifier(crops)
+        
+        rec_res, _ = self.ocr.text_recognizer(crops)
+        return [(text, float(score)) for text, score in rec_res]
+    
+    def _crop_line(self, img_array: np.ndarray, box: np.ndarray) -> np.ndarray:
+        """Вырезает строку по bbox так же, как PaddleOCR в TextSystem"""
+        if self.ocr.args.det_box_type == 'quad':
+            return get_rotate_crop_image(img_array, box.copy())
+        return get_minarea_rect_crop(img_array, box.copy())
     
     def extract_text_only(self, results: List[Dict]) -> str:
-        """Извлекает только текст из результатов OCR"""
-        return '\n'.join([item['text'] for item in results])
+        """Извлекает текст из результатов OCR в порядке чтения (колонки, строки, абзацы)"""
+        return page_text(results)
+    
+    def build_page_result(
+        self,
+        ocr_results: List[Dict],
+        dimensions: Dict,
+        dpi: int,
+        source: str = 'ocr',
+        regions: List[Dict] | None = None
+    ) -> Dict:
+        """
+        Собирает содержимое page_NNN.json
+        
+        dpi: разрешение, в пикселях которого записаны bbox
+            (bbox * 72 / dpi — координаты в пунктах PDF)
+        source: 'ocr' — распознано PaddleOCR, 'native' — текстовый слой PDF
+        regions: области разметки страницы (только при use_layout)
+        """
+        page_result = {
+            'text': self.extract_text_only(ocr_results),
+            'ocr_results': ocr_results,
+            'dimensions': dimensions,
+            'dpi': dpi,
+            'source': source
+        }
+        if regions is not None:
+            page_result['regions'] = regions
+        return page_result
+    
+    def process_page(
+        self,
+        pdf_processor,
+        page_num: int,
+        output_dir: Path,
+        render_policy: RenderPolicy | None = None,
+        use_native_text: bool = False
+    ) -> Dict:
+        """
+        Обрабатывает одну страницу PDF и сохраняет page_NNN.json
+        """
+        image, dimensions, native_results, dpi, _ = load_page(
+            pdf_processor, page_num, render_policy or RenderPolicy(), use_native_text
+        )
+        
+        if native_results is not None:
+            page_result = self.build_page_result(native_results, dimensions, dpi, source='native')
+        else:
+            # OCR
+            analysis = self.analyze_images([image])[0]
+            page_result = self.build_page_result(
+                analysis['ocr_results'], dimensions, dpi, regions=analysis['regions']
+            )
+        
+        write_page_result(output_dir, page_num, page_result)
+        
+        return page_result
+    
+    def process_pages(
+        self,
+        pdf_processor,
+        pages: List[int],
+        output_dir: Path,
+        **kwargs
+    ) -> Dict[int, Dict]:
+        """
+        Обрабатывает список страниц PDF и возвращает все результаты сразу
+        
+        Параметры — как у iter_pages. Для длинных книг лучше iter_pages:
+        здесь результаты всех страниц держатся в памяти.
+        """
+        return dict(self.iter_pages(pdf_processor, pages, output_dir, **kwargs))
+    
+    def iter_pages(
+        self,
+        pdf_processor,
+        pages: List[int],
+        output_dir: Path,
+        render_policy: RenderPolicy | None = None,
+        manifest: OCRManifest | None = None,
+        show_progress: bool = True,
+        queue_size: int = 4,
+        use_native_text: bool = False,
+        timing_log: TimingLog | None = None
+    ) -> Iterator[Tuple[int, Dict]]:
+        """
+        Обрабатывает список страниц PDF конвейером из трёх стадий и
+        отдаёт (page_num, page_result) по мере готовности
+        
+        render (поток) -> OCR (текущий поток) -> запись JSON (поток).
+        Стадии связаны очередями размера queue_size, поэтому растеризация
+        и запись на диск перекрываются с распознаванием, а в памяти
+        одновременно находится не больше ~2 * queue_size страниц.
+        OCR-стадия забирает страницы пачками по page_batch_size и
+        распознаёт их через process_images.
+        
+        Если передан manifest, каждая записанная страница сразу отмечается в нём.
+        При use_native_text страницы с пригодным текстовым слоем не
+        растеризуются и проходят мимо OCR.
+        Если передан timing_log, после записи каждой страницы в него уходит
+        время её стадий: render, detect, recognize, build (сборка текста
+        страницы) и write.
+        
+        Генератор ничего не накапливает: страница уже сохранена (или
+        стоит в очереди на запись), и вызывающий код может её отбросить.
+        """
+        if not pages:
+            return
+        
+        render_policy = render_policy or RenderPolicy()
+        stop_event = threading.Event()
+        render_queue = queue.Queue(maxsize=max(queue_size, self.page_batch_size))
+        write_queue = queue.Queue(maxsize=queue_size)
+        writer_errors = []
+        
+        def render_stage():
+            # PyMuPDF не потокобезопасен: с документом работает только этот поток
+            try:
+                for page_num in pages:
+                    if stop_event.is_set():
+                        return
+                    page = load_page(pdf_processor, page_num, render_policy, use_native_text)
+                    _put_or_stop(render_queue, (page_num, *page), stop_event)
+            except Exception as e:
+                _put_or_stop(render_queue, _StageError(e), stop_event)
+                return
+            _put_or_stop(render_queue, _END_OF_STREAM, stop_event)
+        
+        def writer_stage():
+            try:
+                while True:
+                    item = _get_or_stop(write_queue, stop_event)
+                    if item is _END_OF_STREAM:
+                        return
+                    page_num, page_result, timer = item
+                    with timer.span('write'):
+                        write_page_result(output_dir, page_num, page_result)
+                    
+                    if manifest is not None:
+                        manifest.mark_done(page_num, summarize_page(page_num, page_result))
+                        manifest.save()
+                    
+                    if timing_log is not None:
+                        timing_log.write(
+                            page_num, timer,
+                            source=page_result['source'],
+                            lines=len(page_result['ocr_results'])
+                        )
+            except Exception as e:
+                writer_errors.append(e)
+                stop_event.set()
+        
+        render_thread = threading.Thread(target=render_stage, name="ocr-render", daemon=True)
+        writer_thread = threading.Thread(target=writer_stage, name="ocr-writer", daemon=True)
+        render_thread.start()
+        writer_thread.start()
+        
+        try:
+            with tqdm(total=len(pages), desc="OCR Processing", disable=not show_progress) as pbar:
+                finished = False
+                while not finished:
+                    batch = []
+                    while len(batch) < self.page_batch_size:
+                        item = _get_or_stop(render_queue, stop_event)
+                        if item is _END_OF_STREAM:
+                            finished = True
+                            break
+                        if isinstance(item, _StageError):
+                            raise item.error
+                        batch.append(item)
+                    
+                    # Страницы из текстового слоя проходят мимо OCR
+                    ocr_batch = [item for item in batch if item[3] is None]
+                    analyses = self.analyze_images([item[1] for item in ocr_batch])
+                    ocr_by_page = {
+                        item[0]: analysis
+                        for item, analysis in zip(ocr_batch, analyses)
+                    }
+                    
+                    del ocr_batch, analyses
+                    
+                    for page_num, _, dimensions, native_results, dpi, timer in batch:
+                        if native_results is not None:
+                            with timer.span('build'):
+                                page_result = self.build_page_result(
+                                    native_results, dimensions, dpi, source='native'
+                                )
+                        else:
+                            analysis = ocr_by_page.pop(page_num)
+                            for stage, seconds in analysis['timings'].items():
+                                timer.add(stage, seconds)
+                            with timer.span('build'):
+                                page_result = self.build_page_result(
+                                    analysis['ocr_results'], dimensions, dpi,
+                                    regions=analysis['regions']
+                                )
+                        
+                        _put_or_stop(write_queue, (page_num, page_result, timer), stop_event)
+                        pbar.update(1)
+                        yield page_num, page_result
+                    
+                    del batch
+        except BaseException:
+            stop_event.set()
+            raise
+        finally:
+            _put_or_stop(write_queue, _END_OF_STREAM, stop_event)
+            render_thread.join()
+            writer_thread.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
     
     def process_pdf_pages(
         self, 
         pdf_processor, 
         page_range: Tuple[int, int],
-        output_dir: Path
+        output_dir: Path,
+        render_policy: RenderPolicy | None = None,
+        manifest: OCRManifest | None = None,
+        use_native_text: bool = False
     ) -> Dict[int, Dict]:
         """
         Обрабатывает страницы PDF
         
+        Если передан manifest, уже готовые страницы пропускаются.
+        Потоковый вариант без накопления результатов — iter_pdf_pages.
+        
         Returns:
             Dict[page_num, {
                 'text': str,
                 'ocr_results': List[Dict],
-                'dimensions': Dict
+                'dimensions': Dict,
+                'source': 'ocr' | 'native'
             }]
         """
-        results = {}
-        
+        return dict(self.iter_pdf_pages(
+            pdf_processor,
+            page_range,
+            output_dir,
+            render_policy=render_policy,
+            manifest=manifest,
+            use_native_text=use_native_text
+        ))
+    
+    def iter_pdf_pages(
+        self,
+        pdf_processor,
+        page_range: Tuple[int, int],
+        output_dir: Path,
+        render_policy: RenderPolicy | None = None,
+        manifest: OCRManifest | None = None,
+        use_native_text: bool = False,
+        timing_log: TimingLog | None = None
+    ) -> Iterator[Tuple[int, Dict]]:
+        """Потоковый process_pdf_pages: отдаёт (page_num, page_result) по одной"""
         start_page, end_page = page_range
+        pages = list(range(start_page, end_page))
         
-        for page_num in tqdm(range(start_page, end_page), desc="OCR Processing"):
-            # Извлекаем изображение
-            image = pdf_processor.extract_page_as_image(page_num)
-            
-            # OCR
-            ocr_results = self.process_image(image)
-            
-            # Извлекаем текст
-            text = self.extract_text_only(ocr_results)
-            
-            # Размеры страницы
-            dimensions = pdf_processor.get_page_dimensions(page_num)
-            
-            results[page_num] = {
-                'text': text,
-                'ocr_results': ocr_results,
-                'dimensions': dimensions
-            }
-            
-            # Сохраняем промежуточный результат
-            page_output = output_dir / f"page_{page_num:03d}.json"
-            with open(page_output, 'w', encoding='utf-8') as f:
-                json.dump(results[page_num], f, ensure_ascii=False, indent=2)
+        if manifest is not None:
+            pages = manifest.pending_pages(pages)
+        
+        yield from self.iter_pages(
+            pdf_processor,
+            pages,
+            output_dir,
+            render_policy=render_policy,
+            manifest=manifest,
+            use_native_text=use_native_text,
+            timing_log=timing_log
+        )
+
+def summarize_page(page_num: int, page_result: Dict) -> Dict:
+    """Лёгкая сводка по странице (без текста и bbox) для summary.json"""
+    confidences = [line['confidence'] for line in page_result['ocr_results']]
+    return {
+        'page': page_num,
+        'source': page_result['source'],
+        'dpi': page_result['dpi'],
+        'total_lines': len(confidences),
+        'total_chars': len(page_result['text']),
+        'avg_confidence': sum(confidences) / len(confidences) if confidences else 0.0
+    }
+
+def _to_ocr_array(image: Image.Image | np.ndarray) -> np.ndarray:
+    """Приводит изображение к трёхканальному массиву для моделей PaddleOCR"""
+    img_array = image if isinstance(image, np.ndarray) else np.asarray(image)
+    
+    if img_array.ndim == 2:
+        return cv2.cvtColor(img_array, cv2.COLOR_GRAY2BGR)
+    if img_array.shape[2] == 4:
+        return img_array[:, :, :3]
+    return img_array
+
+def load_page(
+    pdf_processor,
+    page_num: int,
+    render_policy: RenderPolicy,
+    use_native_text: bool
+) -> Tuple[np.ndarray | None, Dict, List[Dict] | None, int, StageTimer]:
+    """
+    Готовит страницу к распознаванию (стадия render)
+    
+    Returns:
+        (image, dimensions, native_results, dpi, timer): image = None, если
+        страница взята из текстового слоя (native_results), иначе
+        native_results = None; timer — время стадий страницы (пока только render)
+    """
+    timer = StageTimer()
+    with timer.span('render'):
+        # Размеры страницы
+        dimensions = pdf_processor.get_page_dimensions(page_num)
+        
+        if use_native_text:
+            native_results = probe_native_text(pdf_processor, page_num, render_policy.dpi)
+            if native_results is not None:
+                return None, dimensions, native_results, render_policy.dpi, timer
+        
+        # Извлекаем изображение
+        image, dpi = pdf_processor.render_page(page_num, render_policy)
+    return image, dimensions, None, dpi, timer
+
+def probe_native_text(pdf_processor, page_num: int, dpi: int) -> List[Dict] | None:
+    """
+    Возвращает строки текстового слоя страницы, если он пригоден вместо OCR,
+    иначе None
+    """
+    lines = pdf_processor.extract_text_lines_native(page_num, dpi=dpi)
+    text = '\n'.join(line['text'] for line in lines)
+    
+    if is_text_layer_usable(text):
+        return lines
+    return None
+
+class _StageError:
+    """Исключение стадии конвейера, переданное через очередь"""
+    def __init__(self, error: Exception):
+        self.error = error
+
+_END_OF_STREAM = object()
+
+def _put_or_stop(target_queue: queue.Queue, item, stop_event: threading.Event):
+    """Кладёт элемент в ограниченную очередь, не зависая после остановки конвейера"""
+    while True:
+        try:
+            target_queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            if stop_event.is_set():
+                return
+
+def _get_or_stop(source_queue: queue.Queue, stop_event: threading.Event):
+    """Берёт элемент из очереди; после остановки конвейера возвращает _END_OF_STREAM"""
+    while True:
+        try:
+            return source_queue.get(timeout=0.1)
+        except queue.Empty:
+            if stop_event.is_set():
+                return _END_OF_STREAM
+
+def write_page_result(output_dir: Path, page_num: int, page_result: Dict):
+    """
+    Сохраняет page_NNN.json атомарно, чтобы после падения
+    не оставалось недописанных файлов
+    """
+    page_output = output_dir / f"page_{page_num:03d}.json"
+    tmp_output = page_output.with_suffix('.json.tmp')
+    with open(tmp_output, 'w', encoding='utf-8') as f:
+        json.dump(page_result, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_output, page_output)
+
+# Обработчики worker-процесса по книгам: кэш строк и решение о классификаторе
+# угла живут, пока процесс получает задачи этой книги, а не одну задачу
+_WORKER_HANDLERS: "OrderedDict[Tuple, OCRHandler]" = OrderedDict()
+_WORKER_HANDLERS_MAX = 8
+
+def _get_worker_handler(output_dir: Path, handler_kwargs: Dict) -> "OCRHandler":
+    """OCRHandler книги в этом процессе (давно не использованные вытесняются)"""
+    key = (str(output_dir), tuple(sorted(handler_kwargs.items())))
+    handler = _WORKER_HANDLERS.get(key)
+    if handler is None:
+        handler = OCRHandler(**handler_kwargs)
+        _WORKER_HANDLERS[key] = handler
+        if len(_WORKER_HANDLERS) > _WORKER_HANDLERS_MAX:
+            _WORKER_HANDLERS.popitem(last=False)
+    _WORKER_HANDLERS.move_to_end(key)
+    return handler
+
+def _warm_up_worker(engine_kwargs: Dict):
+    """Инициализатор worker-процесса: модели грузятся до первой задачи"""
+    warm_up_engine(get_ocr_engine(**engine_kwargs))
+
+def _process_shard(
+    pdf_path: Path,
+    pages: List[int],
+    output_dir: Path,
+    render_policy: RenderPolicy,
+    handler_kwargs: Dict,
+    use_native_text: bool,
+    timing_log: TimingLog | None = None
+) -> Tuple[List[Dict], Dict | None]:
+    """
+    Точка входа worker-процесса: свой PDFProcessor и движок PaddleOCR
+    из реестра процесса (загружен и прогрет инициализатором пула)
+    
+    OCRHandler книги переиспользуется между задачами процесса
+    (_get_worker_handler), поэтому кэш строк и проба ориентации не
+    начинаются заново с каждой задачей. Полные результаты остаются на
+    диске, в главный процесс уходят только сводки страниц и статистика
+    кэша строк за эту задачу.
+    """
+    pdf_processor = PDFProcessor(pdf_path)
+    try:
+        ocr_handler = _get_worker_handler(output_dir, handler_kwargs)
+        stats_before = ocr_handler.line_cache_stats()
+        summaries = [
+            summarize_page(page_num, page_result)
+            for page_num, page_result in ocr_handler.iter_pages(
+                pdf_processor, pages, output_dir, render_policy=render_policy,
+                show_progress=False, use_native_text=use_native_text,
+                timing_log=timing_log
+            )
+        ]
+        stats_after = ocr_handler.line_cache_stats()
+        if stats_after is None:
+            return summaries, None
+        return summaries, diff_cache_stats(stats_after, stats_before)
+    finally:
+        pdf_processor.close()
+
+def iter_pdf_pages_parallel(
+    pdf_path: Path,
+    page_range: Tuple[int, int],
+    output_dir: Path,
+    num_workers: int,
+    render_policy: RenderPolicy | None = None,
+    lang: str = 'ru',
+    use_gpu: bool = False,
+    manifest: OCRManifest | None = None,
+    use_native_text: bool = False,
+    rec_batch_size: int = 16,
+    page_batch_size: int = 4,
+    use_angle_cls: bool | None = None,
+    line_cache_size: int = 50000,
+    use_layout: bool = False,
+    layout_lang: str = 'en',
+    run_stats: Dict | None = None,
+    timing_log: TimingLog | None = None,
+    shard_size: int = 8,
+    queue_depth: int = 2
+) -> Iterator[Dict]:
+    """
+    Обрабатывает страницы PDF пулом процессов
+    
+    Страницы делятся на задачи по shard_size подряд идущих страниц; в пуле
+    одновременно не больше num_workers * queue_depth задач. Каждый worker
+    загружает свою модель PaddleOCR, держит OCRHandler книги между задачами
+    и пишет page_NNN.json сам. Отдаются сводки страниц (summarize_page)
+    строго по возрастанию номеров: готовые задачи придерживаются, пока не
+    завершатся предыдущие. Манифест ведёт только главный процесс: страницы
+    отмечаются сразу по завершении задачи, так что после падения заново
+    распознаётся не больше нескольких задач. Если передан run_stats, в него складывается
+    суммарная статистика кэшей строк worker'ов (ключ 'line_cache').
+    Журнал времени timing_log worker'ы пишут сами (дозапись в один файл).
+    """
+    start_page, end_page = page_range
+    pages = list(range(start_page, end_page))
+    
+    if manifest is not None:
+        pages = manifest.pending_pages(pages)
+    
+    shards = [pages[i:i + shard_size] for i in range(0, len(pages), max(1, shard_size))]
+    if not shards:
+        return
+    num_workers = min(num_workers, len(shards))
+    
+    # Делим потоки CPU между процессами, чтобы не было переподписки
+    cpu_threads = max(1, (os.cpu_count() or 1) // max(1, num_workers))
+    engine_kwargs = {
+        'lang': lang,
+        'use_gpu': use_gpu,
+        'cpu_threads': cpu_threads,
+        'rec_batch_size': rec_batch_size
+    }
+    handler_kwargs = {
+        **engine_kwargs,
+        'page_batch_size': page_batch_size,
+        'use_angle_cls': use_angle_cls,
+        'line_cache_size': line_cache_size,
+        'use_layout': use_layout,
+        'layout_lang': layout_lang
+    }
+    
+    completed = {}
+    next_shard = 0
+    futures = {}
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_warm_up_worker,
+        initargs=(engine_kwargs,)
+    ) as executor:
+        def submit(idx: int):
+            future = executor.submit(
+                _process_shard, pdf_path, shards[idx], output_dir, render_policy,
+                handler_kwargs, use_native_text, timing_log
+            )
+            futures[future] = idx
+        
+        submitted = min(len(shards), num_workers * queue_depth)
+        for idx in range(submitted):
+            submit(idx)
         
-        return results
\ No newline at end of file
+        with tqdm(total=len(pages), desc=f"OCR Processing ({num_workers} workers)") as pbar:
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard_summaries, cache_stats = future.result()
+                    completed[futures.pop(future)] = shard_summaries
+                    
+                    if run_stats is not None and cache_stats is not None:
+                        run_stats['line_cache'] = merge_cache_stats(
+                            run_stats.get('line_cache', {}), cache_stats
+                        )
+                    pbar.update(len(shard_summaries))
+                    
+                    if manifest is not None:
+                        for page_summary in shard_summaries:
+                            manifest.mark_done(page_summary['page'], page_summary)
+                        manifest.save()
+                    
+                    if submitted < len(shards):
+                        submit(submitted)
+                        submitted += 1
+                
+                while next_shard in completed:
+                    yield from completed.pop(next_shard)
+                    next_shard += 1
\ No newline at end of file
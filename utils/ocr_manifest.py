@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+def compute_file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 содержимого файла (читается блоками)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_ocr_version() -> str:
+    """Версия PaddleOCR, которой распознаются страницы"""
+    try:
+        import paddleocr
+        return getattr(paddleocr, '__version__', 'unknown')
+    except ImportError:
+        return 'unknown'
+
+class OCRManifest:
+    """
+    Манифест OCR-прогона: лежит рядом с summary.json
+    
+    Хранит хэш PDF, параметры рендеринга и распознавания, статус и сводку
+    (summarize_page) каждой страницы.
+    Если PDF или параметры изменились, все страницы считаются
+    недействительными и будут распознаны заново.
+    """
+    FILENAME = "manifest.json"
+    
+    def __init__(self, output_dir: Path, settings: Dict, pages: Dict[str, Dict] | None = None):
+        self.output_dir = output_dir
+        self.settings = settings
+        self.pages = pages or {}
+    
+    @property
+    def path(self) -> Path:
+        return self.output_dir / self.FILENAME
+    
+    @classmethod
+    def load(
+        cls,
+        output_dir: Path,
+        pdf_path: Path,
+        render_settings: Dict,
+        lang: str,
+        use_native_text: bool = False,
+        use_layout: bool = False,
+        layout_lang: str = 'en'
+    ) -> "OCRManifest":
+        """
+        Загружает манифест из output_dir или создаёт новый
+        
+        Статусы страниц сохраняются только если совпадают хэш PDF,
+        параметры рендеринга (DPI и т.д.), язык, версия OCR, режим
+        текстового слоя PDF и анализ разметки.
+        """
+        settings = {
+            'pdf_sha256': compute_file_hash(pdf_path),
+            'render': render_settings,
+            'lang': lang,
+            'ocr_version': get_ocr_version(),
+            'use_native_text': use_native_text,
+            'layout': layout_lang if use_layout else None
+        }
+        
+        manifest_path = output_dir / cls.FILENAME
+        if not manifest_path.exists():
+            return cls(output_dir, settings)
+        
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        if data.get('settings') != settings:
+            print("Параметры OCR или PDF изменились — все страницы будут обработаны заново")
+            return cls(output_dir, settings)
+        
+        return cls(output_dir, settings, data.get('pages', {}))
+    
+    def page_file(self, page_num: int) -> Path:
+        return self.output_dir / f"page_{page_num:03d}.json"
+    
+    def is_done(self, page_num: int) -> bool:
+        entry = self.pages.get(str(page_num))
+        return (
+            entry is not None
+            and entry.get('status') == 'done'
+            and self.page_file(page_num).exists()
+        )
+    
+    def pending_pages(self, pages: Iterable[int]) -> List[int]:
+        """Страницы, которые отсутствуют или недействительны"""
+        return [page_num for page_num in pages if not self.is_done(page_num)]
+    
+    def done_pages(self, pages: Iterable[int]) -> List[int]:
+        return [page_num for page_num in pages if self.is_done(page_num)]
+    
+    def mark_done(self, page_num: int, summary: Dict | None = None):
+        entry = {
+            'status': 'done',
+            'file': self.page_file(page_num).name
+        }
+        if summary is not None:
+            entry['summary'] = summary
+        self.pages[str(page_num)] = entry
+    
+    def page_summaries(self, pages: Iterable[int]) -> List[Dict]:
+        """Сводки готовых страниц (всех запусков), у которых они сохранены"""
+        return [
+            self.pages[str(page_num)]['summary']
+            for page_num in self.done_pages(pages)
+            if 'summary' in self.pages[str(page_num)]
+        ]
+    
+    def save(self):
+        """Атомарно записывает манифест (через временный файл)"""
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'settings': self.settings,
+                'pages': dict(sorted(self.pages.items(), key=lambda item: int(item[0])))
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Чистка OCR-шума перед структурированием
+
+PaddleOCR часто отдаёт строку на каждое слово, подменяет кириллические
+буквы похожими латинскими ("Tкayeba", "Bладимировна"), а перенос
+разрывает слово на две строки. Здесь слова собираются обратно в строки и
+абзацы по bbox (utils.reading_order), латинские двойники сводятся к
+кириллице, переносы склеиваются, а chunks без осмысленного текста
+отсеиваются.
+"""
+
+import re
+from typing import Dict, List
+
+from config import Config
+from .reading_order import page_paragraphs
+
+# Латинские буквы, неотличимые от кириллических на скане
+HOMOGLYPHS = str.maketrans({
+    'A': 'А', 'B': 'В', 'C': 'С', 'E': 'Е', 'H': 'Н', 'K': 'К', 'M': 'М',
+    'O': 'О', 'P': 'Р', 'T': 'Т', 'X': 'Х', 'Y': 'У',
+    'a': 'а', 'c': 'с', 'e': 'е', 'k': 'к', 'o': 'о', 'p': 'р', 'x': 'х', 'y': 'у'
+})
+FOLDABLE = frozenset(chr(code) for code in HOMOGLYPHS)
+
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+CYRILLIC_PATTERN = re.compile(r'[А-Яа-яЁё]')
+LATIN_PATTERN = re.compile(r'[A-Za-z]')
+# "5о758": буква О между цифрами — это ноль
+DIGIT_ZERO_PATTERN = re.compile(r'(?<=\d)[OoОо](?=\d)')
+# Перенос: буква, дефис в конце строки, строчная буква в начале следующей
+HYPHEN_BREAK_PATTERN = re.compile(r'(?<=[^\W\d_])[-‐¬]\n(?=[a-zа-яё])')
+SPACES_PATTERN = re.compile(r'[ \t]+')
+# Пример: число (с пробелами между разрядами, десятичной запятой или
+# дробью), знак, число. Обрывки вроде ".151+51о75" начинаются не с числа
+# и примером не считаются
+ARITHMETIC_PATTERN = re.compile(
+    r'(?<![\d.,])\d+(?: \d{3})*(?:,\d+|/\d+)?\s*[-+−–*×·:/=<>]\s*\(?\d'
+)
+
+def fold_homoglyphs(line: str) -> str:
+    """
+    Заменяет латинские двойники кириллицей
+    
+    Слово со смесью алфавитов сводится к кириллице целиком; чисто латинское
+    слово — только если оно из двух и более букв-двойников, строка в
+    основном кириллическая и в слове есть строчные буквы ("Ha" -> "На")
+    или оно длиннее четырёх букв. Одиночные латинские буквы и короткие
+    прописные (переменные, вершины и имена фигур: "AB", "ABC", "AOB") не
+    трогаются.
+    """
+    line = DIGIT_ZERO_PATTERN.sub('0', line)
+    latin = len(LATIN_PATTERN.findall(line))
+    if not latin:
+        return line
+    cyrillic_line = len(CYRILLIC_PATTERN.findall(line)) > latin
+    
+    def fold_word(match: re.Match) -> str:
+        word = match.group()
+        if not LATIN_PATTERN.search(word):
+            return word
+        if CYRILLIC_PATTERN.search(word) or (
+            cyrillic_line
+            and len(word) > 1
+            and all(char in FOLDABLE for char in word)
+            and (not word.isupper() or len(word) > 4)
+        ):
+            return word.translate(HOMOGLYPHS)
+        return word
+    
+    return WORD_PATTERN.sub(fold_word, line)
+
+def normalize_text(lines: List[str]) -> str:
+    """Двойники, лишние пробелы и переносы в тексте из строк"""
+    text = '\n'.join(SPACES_PATTERN.sub(' ', fold_homoglyphs(line)).strip() for line in lines)
+    return HYPHEN_BREAK_PATTERN.sub('', text)
+
+def normalize_page_text(page_data: Dict, skip_types=('header', 'footer')) -> str:
+    """
+    Очищенный текст страницы
+    
+    Строки и абзацы собираются из bbox в порядке чтения (отдельно в каждой
+    области разметки, колонтитулы отбрасываются); абзацы разделяются
+    пустой строкой. Страница без распознанных строк берётся из
+    page_data['text'].
+    """
+    ocr_results = page_data.get('ocr_results', [])
+    if not ocr_results:
+        return '\n\n'.join(
+            normalize_text(block.split('\n')) for block in page_data['text'].split('\n\n')
+        )
+    
+    by_region = page_data.get('regions') and any('region_id' in line for line in ocr_results)
+    blocks: Dict[int, List[Dict]] = {}
+    for line in ocr_results:
+        if by_region and line.get('region') in skip_types:
+            continue
+        blocks.setdefault(line.get('region_id', -1) if by_region else -1, []).append(line)
+    
+    return '\n\n'.join(
+        normalize_text(lines)
+        for region_id in sorted(blocks)
+        for lines in page_paragraphs(blocks[region_id])
+    )
+
+def junk_reason(
+    text: str,
+    min_letters: int = Config.JUNK_MIN_LETTERS,
+    min_letter_ratio: float = Config.JUNK_MIN_LETTER_RATIO
+) -> str | None:
+    """
+    Причина считать текст chunk'а мусором или None
+    
+    Буквами считаются только слова от двух букв: одиночные буквы в OCR-шуме
+    встречаются постоянно. 'short' — букв меньше min_letters, 'noise' —
+    буквы составляют меньше min_letter_ratio непробельных символов.
+    Текст с арифметическим примером ("2,5 + 3,7", "3/4 и 5/8",
+    "в) 45 + 37") мусором не считается, сколько бы в нём ни было букв.
+    """
+    if ARITHMETIC_PATTERN.search(text):
+        return None
+    
+    letters = sum(len(word) for word in WORD_PATTERN.findall(text) if len(word) > 1)
+    if letters < min_letters:
+        return 'short'
+    
+    chars = len(text) - text.count(' ') - text.count('\n')
+    if letters < min_letter_ratio * chars:
+        return 'noise'
+    return None
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""
+Компактное хранилище результатов OCR: один бинарный файл на учебник
+
+Вместо десятков page_NNN.json с bbox в виде вложенных списков все строки
+книги хранятся колонками:
+
+    page_numbers   int32   (P,)       номера страниц
+    line_offsets   int64   (P+1,)     строки страницы i: [line_offsets[i], line_offsets[i+1])
+    bboxes         float32 (N, 4, 2)  bbox строк
+    confidences    float32 (N,)
+    line_text      utf-8 байты + line_text_offsets int64 (N+1,)
+    page_text      utf-8 байты + page_text_offsets int64 (P+1,)
+    line_region_id int32   (N,)       индекс области разметки строки (-1 — нет)
+    line_region    int16   (N,)       тип области: индекс в header['region_types'] (-1 — нет)
+
+Формат файла: 8 байт сигнатуры, длина JSON-заголовка (uint64), заголовок
+(описание массивов и прочие поля страниц: dimensions, dpi, source...),
+затем массивы, выровненные по 64 байта. Читатель отображает файл в память
+(np.memmap) и отдаёт массивы как view без копирования и разбора.
+"""
+
+import json
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+STORE_FILENAME = "pages.bin"
+
+_MAGIC = b'TRPAGES1'
+_ALIGN = 64
+_PAGE_ARRAY_KEYS = ('text', 'ocr_results')
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Склеивает строки в один utf-8 буфер + массив смещений"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+class _ColumnSpool:
+    """Колонка массива, дописываемая во временный файл по страницам"""
+    def __init__(self, path: Path, dtype, item_shape: Tuple[int, ...] = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.item_shape = item_shape
+        self.count = 0
+        self._file = open(path, 'wb')
+
+    def write(self, array: np.ndarray):
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        self._file.write(array.tobytes())
+        self.count += len(array)
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def shape(self) -> List[int]:
+        return [self.count, *self.item_shape]
+
+    @property
+    def nbytes(self) -> int:
+        return self.count * int(np.prod(self.item_shape, dtype=np.int64)) * self.dtype.itemsize
+
+# Колонки на строку (и текст страниц): пишутся во временные файлы
+_SPOOLED_COLUMNS = {
+    'bboxes': (np.float32, (4, 2)),
+    'confidences': (np.float32, ()),
+    'line_text': (np.uint8, ()),
+    'line_text_offsets': (np.int64, ()),
+    'page_text': (np.uint8, ()),
+    'line_region_id': (np.int32, ()),
+    'line_region': (np.int16, ())
+}
+
+def write_page_store(pages: Iterable[Tuple[int, Dict]], store_path: Path) -> Path:
+    """
+    Записывает страницы (page_num, page_data) в хранилище
+
+    page_data — словарь в формате page_NNN.json. Страницы разбираются по
+    одной: колонки строк сразу дописываются во временные файлы рядом с
+    хранилищем, в памяти остаются только массивы на страницу (номера,
+    смещения, прочие поля), так что расход памяти не растёт с числом строк.
+    """
+    page_numbers = []
+    page_meta = []
+    line_offsets = [0]
+    page_text_offsets = [0]
+    region_types = {}
+    line_text_size = 0
+
+    with tempfile.TemporaryDirectory(dir=store_path.parent) as tmp_dir:
+        columns = {
+            name: _ColumnSpool(Path(tmp_dir) / name, dtype, item_shape)
+            for name, (dtype, item_shape) in _SPOOLED_COLUMNS.items()
+        }
+        try:
+            columns['line_text_offsets'].write(np.zeros(1, dtype=np.int64))
+
+            for page_num, page_data in pages:
+                ocr_results = page_data.get('ocr_results', [])
+
+                page_numbers.append(page_num)
+                page_meta.append({
+                    key: value for key, value in page_data.items()
+                    if key not in _PAGE_ARRAY_KEYS
+                })
+                page_text = page_data.get('text', '').encode('utf-8')
+                columns['page_text'].write(np.frombuffer(page_text, dtype=np.uint8))
+                page_text_offsets.append(page_text_offsets[-1] + len(page_text))
+                line_offsets.append(line_offsets[-1] + len(ocr_results))
+                if not ocr_results:
+                    continue
+
+                line_text, text_offsets = _encode_strings([line['text'] for line in ocr_results])
+                columns['line_text'].write(line_text)
+                columns['line_text_offsets'].write(text_offsets[1:] + line_text_size)
+                line_text_size += len(line_text)
+
+                columns['bboxes'].write(
+                    np.asarray([line['bbox'] for line in ocr_results], dtype=np.float32).reshape(-1, 4, 2)
+                )
+                columns['confidences'].write([line['confidence'] for line in ocr_results])
+                columns['line_region_id'].write([line.get('region_id', -1) for line in ocr_results])
+                columns['line_region'].write([
+                    -1 if line.get('region') is None
+                    else region_types.setdefault(line['region'], len(region_types))
+                    for line in ocr_results
+                ])
+        finally:
+            for column in columns.values():
+                column.close()
+
+        arrays = {
+            'page_numbers': np.asarray(page_numbers, dtype=np.int32),
+            'line_offsets': np.asarray(line_offsets, dtype=np.int64),
+            'bboxes': columns['bboxes'],
+            'confidences': columns['confidences'],
+            'line_text': columns['line_text'],
+            'line_text_offsets': columns['line_text_offsets'],
+            'page_text': columns['page_text'],
+            'page_text_offsets': np.asarray(page_text_offsets, dtype=np.int64),
+            'line_region_id': columns['line_region_id'],
+            'line_region': columns['line_region']
+        }
+
+        # Раскладываем массивы с выравниванием (смещения — от начала блока данных)
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            layout[name] = {
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'offset': offset
+            }
+            offset += array.nbytes
+
+        header = json.dumps({
+            'arrays': layout,
+            'pages': page_meta,
+            'region_types': list(region_types)
+        }, ensure_ascii=False).encode('utf-8')
+        data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+        tmp_path = store_path.with_suffix(store_path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]['offset'])
+                if isinstance(array, _ColumnSpool):
+                    with open(array.path, 'rb') as column_file:
+                        shutil.copyfileobj(column_file, f)
+                else:
+                    f.write(np.ascontiguousarray(array).tobytes())
+            # seek без записи не удлиняет файл: пустые массивы в конце
+            # (книга без строк OCR) иначе указывали бы за его край
+            f.truncate(data_start + offset)
+        tmp_path.replace(store_path)
+
+    return store_path
+
+class PageStore:
+    """
+    Читатель хранилища страниц с отображением файла в память
+
+    Массивы (bboxes, confidences, ...) — view на mmap, страницы
+    собираются в словари формата page_NNN.json только по запросу.
+    """
+    def __init__(self, store_path: Path):
+        self.store_path = store_path
+        self._buffer = np.memmap(store_path, dtype=np.uint8, mode='r')
+
+        if bytes(self._buffer[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{store_path} не является хранилищем страниц OCR")
+
+        header_len = struct.unpack('<Q', bytes(self._buffer[len(_MAGIC):len(_MAGIC) + 8]))[0]
+        header_start = len(_MAGIC) + 8
+        header = json.loads(bytes(self._buffer[header_start:header_start + header_len]))
+        data_start = -(-(header_start + header_len) // _ALIGN) * _ALIGN
+
+        self.page_meta = header['pages']
+        self.region_types = header.get('region_types', [])
+        self.arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            start = data_start + spec['offset']
+            self.arrays[name] = np.frombuffer(
+                self._buffer, dtype=dtype, count=count, offset=start
+            ).reshape(spec['shape'])
+
+        self.page_numbers = self.arrays['page_numbers']
+        self._index = {int(page_num): idx for idx, page_num in enumerate(self.page_numbers)}
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    def __contains__(self, page_num: int) -> bool:
+        return page_num in self._index
+
+    def _string(self, name: str, idx: int) -> str:
+        offsets = self.arrays[f'{name}_offsets']
+        return self.arrays[name][offsets[idx]:offsets[idx + 1]].tobytes().decode('utf-8')
+
+    def page_text(self, page_num: int) -> str:
+        """Текст страницы без разбора строк и bbox"""
+        return self._string('page_text', self._index[page_num])
+
+    def page_lines(self, page_num: int) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Строки страницы в виде массивов
+
+        Returns:
+            (bboxes (n, 4, 2) float32, confidences (n,) float32, texts)
+        """
+        idx = self._index[page_num]
+        start, end = self.arrays['line_offsets'][idx:idx + 2]
+        texts = [self._string('line_text', line_idx) for line_idx in range(start, end)]
+        return self.arrays['bboxes'][start:end], self.arrays['confidences'][start:end], texts
+
+    def get_page(self, page_num: int) -> Dict:
+        """Страница в формате page_NNN.json"""
+        bboxes, confidences, texts = self.page_lines(page_num)
+
+        page_data = dict(self.page_meta[self._index[page_num]])
+        page_data['text'] = self.page_text(page_num)
+        page_data['ocr_results'] = [
+            {'bbox': bbox.tolist(), 'text': text, 'confidence': float(confidence)}
+            for bbox, confidence, text in zip(bboxes, confidences, texts)
+        ]
+
+        # Разметка строк (если страница распознавалась с анализом layout)
+        if 'line_region' not in self.arrays:
+            return page_data
+
+        idx = self._index[page_num]
+        start, end = self.arrays['line_offsets'][idx:idx + 2]
+        for line, region_id, region in zip(
+            page_data['ocr_results'],
+            self.arrays['line_region_id'][start:end],
+            self.arrays['line_region'][start:end]
+        ):
+            if region >= 0:
+                line['region'] = self.region_types[region]
+                line['region_id'] = int(region_id)
+
+        return page_data
+
+    def iter_pages(self, pages: Iterable[int] | None = None) -> Iterator[Tuple[int, Dict]]:
+        page_nums = [int(page_num) for page_num in self.page_numbers] if pages is None else pages
+        for page_num in page_nums:
+            yield page_num, self.get_page(page_num)
+
+def _json_page_files(ocr_dir: Path) -> Dict[int, Path]:
+    return {
+        int(page_file.stem.split('_')[1]): page_file
+        for page_file in sorted(ocr_dir.glob("page_*.json"))
+    }
+
+def iter_json_pages(ocr_dir: Path, pages: Iterable[int] | None = None) -> Iterator[Tuple[int, Dict]]:
+    """Страницы из page_NNN.json по порядку номеров (или только pages)"""
+    page_files = _json_page_files(ocr_dir)
+    for page_num in sorted(page_files) if pages is None else pages:
+        with open(page_files[page_num], 'r', encoding='utf-8') as f:
+            page_data = json.load(f)
+
+        yield page_num, page_data
+
+def convert_json_dir(ocr_dir: Path, store_path: Path | None = None) -> Path:
+    """Собирает page_*.json директории в хранилище (по умолчанию ocr_dir/pages.bin)"""
+    store_path = store_path or ocr_dir / STORE_FILENAME
+    return write_page_store(iter_json_pages(ocr_dir), store_path)
+
+def is_store_fresh(ocr_dir: Path) -> bool:
+    """Хранилище есть и не старее самого свежего page_*.json"""
+    store_path = ocr_dir / STORE_FILENAME
+    if not store_path.exists():
+        return False
+
+    store_mtime = store_path.stat().st_mtime
+    return all(
+        page_file.stat().st_mtime <= store_mtime
+        for page_file in ocr_dir.glob("page_*.json")
+    )
+
+def iter_ocr_pages(ocr_dir: Path, pages: Iterable[int] | None = None) -> Iterator[Tuple[int, Dict]]:
+    """
+    Страницы OCR-директории: из pages.bin, если он актуален, иначе из JSON
+
+    pages — номера нужных страниц (из list_ocr_pages); None — все по порядку.
+    """
+    if is_store_fresh(ocr_dir):
+        yield from PageStore(ocr_dir / STORE_FILENAME).iter_pages(pages)
+    else:
+        yield from iter_json_pages(ocr_dir, pages)
+
+def list_ocr_pages(ocr_dir: Path) -> List[int]:
+    """Номера страниц OCR-директории по возрастанию"""
+    if is_store_fresh(ocr_dir):
+        return sorted(int(page_num) for page_num in PageStore(ocr_dir / STORE_FILENAME).page_numbers)
+    return sorted(_json_page_files(ocr_dir))
+
+if __name__ == "__main__":
+    import sys
+
+    # Пример: python -m utils.page_store data/ocr/математика_5_v2
+    if len(sys.argv) < 2:
+        print("Использование: python -m utils.page_store <ocr_dir> [<ocr_dir> ...]")
+        sys.exit(1)
+
+    for arg in sys.argv[1:]:
+        ocr_dir = Path(arg)
+        store_path = convert_json_dir(ocr_dir)
+        json_size = sum(f.stat().st_size for f in ocr_dir.glob("page_*.json"))
+        print(
+            f"✓ {ocr_dir.name}: {json_size / 1024:.0f} KB JSON -> "
+            f"{store_path.stat().st_size / 1024:.0f} KB ({store_path.name})"
+        )
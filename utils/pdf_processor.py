@@ -1,9 +1,92 @@
 import fitz  # PyMuPDF
 from PIL import Image
+import numpy as np
 import io
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import json
+import unicodedata
+
+def assess_text_quality(text: str) -> Dict:
+    """
+    Оценивает качество текстового слоя PDF
+    
+    Returns:
+        Dict: {
+            'chars': число непробельных символов,
+            'cyrillic_ratio': доля кириллицы среди букв,
+            'garbage_ratio': доля "мусора" (U+FFFD, управляющие и private-use символы)
+        }
+    """
+    chars = [c for c in text if not c.isspace()]
+    letters = [c for c in chars if c.isalpha()]
+    cyrillic = sum(1 for c in letters if '\u0400' <= c <= '\u04ff')
+    garbage = sum(
+        1 for c in chars
+        if c == '\ufffd' or unicodedata.category(c) in ('Cc', 'Co', 'Cn', 'Cs')
+    )
+    
+    return {
+        'chars': len(chars),
+        'cyrillic_ratio': cyrillic / len(letters) if letters else 0.0,
+        'garbage_ratio': garbage / len(chars) if chars else 1.0
+    }
+
+def is_text_layer_usable(
+    text: str,
+    min_chars: int = 50,
+    min_cyrillic_ratio: float = 0.5,
+    max_garbage_ratio: float = 0.05
+) -> bool:
+    """Решает, можно ли взять текстовый слой страницы вместо OCR"""
+    quality = assess_text_quality(text)
+    return (
+        quality['chars'] >= min_chars
+        and quality['cyrillic_ratio'] >= min_cyrillic_ratio
+        and quality['garbage_ratio'] <= max_garbage_ratio
+    )
+
+class RenderPolicy:
+    """
+    Политика растеризации страниц для OCR
+    
+    adaptive=False — все страницы рендерятся с dpi.
+    adaptive=True — DPI выбирается для каждой страницы так, чтобы высота
+    строки текста была около target_text_height пикселей (в пределах
+    min_dpi..max_dpi). Высота берётся из текстового слоя, а если его нет —
+    из пробного рендера с probe_dpi.
+    grayscale=True — одноканальный рендер (в 3 раза меньше памяти).
+    """
+    def __init__(
+        self,
+        dpi: int = 300,
+        adaptive: bool = False,
+        grayscale: bool = False,
+        min_dpi: int = 150,
+        max_dpi: int = 400,
+        probe_dpi: int = 96,
+        target_text_height: int = 36
+    ):
+        self.dpi = dpi
+        self.adaptive = adaptive
+        self.grayscale = grayscale
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self.probe_dpi = probe_dpi
+        self.target_text_height = target_text_height
+    
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+class PixmapArray(np.ndarray):
+    """
+    ndarray поверх буфера fitz.Pixmap без копирования
+    
+    Держит ссылку на pixmap, чтобы буфер жил столько же, сколько массив
+    и все его срезы.
+    """
+    def __array_finalize__(self, obj):
+        self.pixmap = getattr(obj, 'pixmap', None)
 
 class PDFProcessor:
     def __init__(self, pdf_path: Path):
@@ -26,11 +109,135 @@ class PDFProcessor:
         img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
         return img
     
+    def extract_page_as_array(
+        self,
+        page_num: int,
+        dpi: int = 300,
+        grayscale: bool = False
+    ) -> np.ndarray:
+        """
+        Извлекает страницу как массив HxWx3 (RGB) или HxW (grayscale) без лишних копий
+        
+        Массив — это view на память pixmap, а не копия, как при
+        Image.frombytes + np.array: страница выделяется в памяти один раз.
+        """
+        page = self.doc[page_num]
+        
+        zoom = dpi / 72
+        mat = fitz.Matrix(zoom, zoom)
+        colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+        pix = page.get_pixmap(matrix=mat, colorspace=colorspace)
+        
+        array = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        if pix.n == 1:
+            array = array.reshape(pix.height, pix.width)
+        else:
+            array = array.reshape(pix.height, pix.width, pix.n)
+        array = array.view(PixmapArray)
+        array.pixmap = pix
+        return array
+    
+    def estimate_text_height(self, page_num: int, probe_dpi: int = 96) -> float | None:
+        """
+        Оценивает типичную высоту строки текста на странице (в пунктах)
+        
+        Если есть текстовый слой — медиана размеров шрифта. Иначе страница
+        рендерится в низком разрешении, и по горизонтальной проекции
+        тёмных пикселей (в нескольких вертикальных полосах, чтобы не
+        склеивать строки соседних колонок) берётся медиана высот строк.
+        
+        Returns:
+            float | None: None, если текста на странице не найдено
+        """
+        page = self.doc[page_num]
+        
+        sizes = [
+            span['size']
+            for block in page.get_text("dict")["blocks"] if block.get("type") == 0
+            for line in block["lines"]
+            for span in line["spans"] if span["text"].strip()
+        ]
+        if sizes:
+            return float(np.median(sizes))
+        
+        gray = self.extract_page_as_array(page_num, dpi=probe_dpi, grayscale=True)
+        ink = gray < 128
+        
+        heights = []
+        for strip in np.array_split(ink, 4, axis=1):
+            ink_rows = strip.mean(axis=1) > 0.01
+            edges = np.diff(np.concatenate(([0], ink_rows.astype(np.int8), [0])))
+            run_heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+            heights.extend(run_heights[run_heights >= 3])
+        
+        if not heights:
+            return None
+        
+        # Высота "чернил" строки — примерно 0.7 кегля: приводим к размеру шрифта,
+        # чтобы обе оценки были в одной шкале
+        return float(np.median(heights)) * 72 / probe_dpi / 0.7
+    
+    def choose_dpi(self, page_num: int, policy: RenderPolicy) -> int:
+        """Выбирает DPI для страницы согласно политике рендеринга"""
+        if not policy.adaptive:
+            return policy.dpi
+        
+        text_height = self.estimate_text_height(page_num, probe_dpi=policy.probe_dpi)
+        if not text_height:
+            return policy.dpi
+        
+        # Округляем до 25 DPI, чтобы близкие страницы рендерились одинаково
+        dpi = policy.target_text_height * 72 / text_height
+        dpi = int(round(dpi / 25) * 25)
+        return max(policy.min_dpi, min(policy.max_dpi, dpi))
+    
+    def render_page(self, page_num: int, policy: RenderPolicy) -> Tuple[np.ndarray, int]:
+        """
+        Рендерит страницу по политике
+        
+        Returns:
+            (array, dpi): изображение и DPI, с которым оно получено
+        """
+        dpi = self.choose_dpi(page_num, policy)
+        array = self.extract_page_as_array(page_num, dpi=dpi, grayscale=policy.grayscale)
+        return array, dpi
+    
     def extract_text_native(self, page_num: int) -> str:
         """Пытается извлечь текст напрямую из PDF"""
         page = self.doc[page_num]
         return page.get_text()
     
+    def extract_text_lines_native(self, page_num: int, dpi: int = 300) -> List[Dict]:
+        """
+        Извлекает строки текстового слоя в формате результатов OCR
+        
+        Координаты bbox пересчитываются в пиксели изображения с данным DPI,
+        чтобы совпадать с bbox от PaddleOCR.
+        
+        Returns:
+            List[Dict]: [{'bbox': [[x1,y1], ...], 'text': str, 'confidence': 1.0}]
+        """
+        page = self.doc[page_num]
+        zoom = dpi / 72
+        
+        lines = []
+        for block in page.get_text("dict")["blocks"]:
+            # type 1 — картинки
+            if block.get("type") != 0:
+                continue
+            for line in block["lines"]:
+                text = ''.join(span['text'] for span in line['spans']).strip()
+                if not text:
+                    continue
+                x0, y0, x1, y1 = (coord * zoom for coord in line['bbox'])
+                lines.append({
+                    'bbox': [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+                    'text': text,
+                    'confidence': 1.0
+                })
+        
+        return lines
+    
     def get_page_dimensions(self, page_num: int) -> Dict:
         """Получает размеры страницы"""
         page = self.doc[page_num]
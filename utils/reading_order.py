@@ -0,0 +1,177 @@
+"""
+Порядок чтения страницы по геометрии bbox
+
+PaddleOCR отдаёт фрагменты в порядке детектора, а у каждого фрагмента
+в page_NNN.json сохранён bbox. Здесь фрагменты раскладываются по колонкам,
+строкам и абзацам векторными операциями NumPy — без попарных сравнений и
+циклов по фрагментам, поэтому страница в сотни слов разбирается за доли
+миллисекунды.
+
+Колонки ищутся по «просветам» — вертикальным полосам, которые почти не
+пересекает ни один фрагмент. Фрагменты поперёк просвета (заголовки на всю
+ширину) делят страницу на полосы: внутри полосы колонки читаются слева
+направо, каждая сверху вниз.
+"""
+
+from typing import Dict, List, Tuple
+import numpy as np
+
+def boxes_from_results(ocr_results: List[Dict]) -> np.ndarray:
+    """(n, 4) float32: x0, y0, x1, y1 — описанные прямоугольники bbox"""
+    if not ocr_results:
+        return np.zeros((0, 4), dtype=np.float32)
+    quads = np.asarray([line['bbox'] for line in ocr_results], dtype=np.float32).reshape(-1, 4, 2)
+    return np.concatenate([quads.min(axis=1), quads.max(axis=1)], axis=1)
+
+def find_column_gutters(
+    boxes: np.ndarray,
+    line_height: float,
+    min_gap: float = 1.0,
+    max_density: float = 0.25,
+    min_column: float = 0.25
+) -> np.ndarray:
+    """
+    X-координаты середин просветов между колонками
+    
+    Для каждого x считается, сколько фрагментов его накрывает (разностный
+    массив + cumsum). Просвет — участок внутри текста шириной от min_gap
+    высот строки, где покрытие не больше max_density от медианного:
+    одиночные заголовки поперёк колонок просвет не закрывают. Колонки по
+    обе стороны просвета должны быть не уже min_column ширины текста —
+    иначе это поле с номерами заданий, а не колонка.
+    """
+    x0 = np.floor(boxes[:, 0]).astype(np.int64)
+    x1 = np.ceil(boxes[:, 2]).astype(np.int64)
+    left = x0.min()
+    width = int(x1.max() - left)
+    if width <= 0:
+        return np.zeros(0)
+    
+    delta = np.zeros(width + 1, dtype=np.int64)
+    np.add.at(delta, x0 - left, 1)
+    np.add.at(delta, x1 - left, -1)
+    coverage = np.cumsum(delta)[:-1]
+    
+    covered = coverage[coverage > 0]
+    sparse = coverage <= max_density * np.median(covered)
+    
+    edges = np.diff(np.concatenate(([0], sparse.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    inner = (starts > 0) & (ends < width) & (ends - starts >= min_gap * line_height)
+    middles = (starts[inner] + ends[inner]) / 2
+    
+    bounds = np.concatenate(([0], middles, [width]))
+    wide = (np.diff(bounds)[:-1] >= min_column * width) & (np.diff(bounds)[1:] >= min_column * width)
+    return left + middles[wide]
+
+def reading_order(
+    boxes: np.ndarray,
+    line_tolerance: float = 0.5,
+    paragraph_gap: float = 1.6,
+    indent: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Порядок чтения фрагментов
+    
+    Args:
+        boxes: (n, 4) x0, y0, x1, y1
+        line_tolerance: Фрагменты одной строки — если центры по вертикали
+            отличаются не больше чем на столько высот строки
+        paragraph_gap: Новый абзац — если шаг строк (от верха до верха)
+            больше обычного для страницы во столько раз
+        indent: ... или строка сдвинута вправо относительно обычного левого
+            края своей колонки больше чем на столько высот строки
+            (абзацный отступ), а предыдущая — нет
+    
+    Returns:
+        (order, line_ids, paragraph_ids): индексы фрагментов в порядке
+        чтения и номера строки и абзаца для каждой позиции order
+    """
+    count = len(boxes)
+    if count == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    
+    heights = boxes[:, 3] - boxes[:, 1]
+    line_height = max(float(np.median(heights)), 1.0)
+    center_x = (boxes[:, 0] + boxes[:, 2]) / 2
+    center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+    
+    # Колонки и полосы между фрагментами на всю ширину
+    gutters = find_column_gutters(boxes, line_height)
+    spanning = (
+        (boxes[:, 0, None] < gutters[None, :]) & (boxes[:, 2, None] > gutters[None, :])
+    ).any(axis=1)
+    if spanning.any():
+        # Остальные слова строки заголовка тоже идут поперёк колонок
+        span_boxes = boxes[spanning]
+        overlap = (
+            np.minimum(boxes[:, None, 3], span_boxes[None, :, 3])
+            - np.maximum(boxes[:, None, 1], span_boxes[None, :, 1])
+        )
+        min_height = np.minimum(heights[:, None], heights[spanning][None, :])
+        spanning |= (overlap >= 0.5 * min_height).any(axis=1)
+    column = np.where(spanning, -1, np.searchsorted(gutters, center_x))
+    band = np.searchsorted(np.sort(boxes[spanning, 1]), center_y, side='right')
+    
+    # Строки: внутри колонки по центру Y, разрыв — скачок центра
+    order = np.lexsort((center_y, column, band))
+    new_group = np.ones(count, dtype=bool)
+    new_group[1:] = (np.diff(band[order]) != 0) | (np.diff(column[order]) != 0)
+    new_line = new_group.copy()
+    new_line[1:] |= np.diff(center_y[order]) > line_tolerance * line_height
+    line_of = np.cumsum(new_line) - 1
+    
+    # Внутри строки — слева направо
+    order = order[np.lexsort((boxes[order, 0], line_of))]
+    
+    # Абзацы: по увеличенному шагу строк и отступу первой строки. Bbox
+    # соседних строк скана часто перекрываются, поэтому сравниваются шаги,
+    # а не просветы. Отступ отсчитывается от медианного левого края колонки,
+    # а не от предыдущей строки: строка после вынесенного на поля номера
+    # задания ("1." левее текста) отступом не считается
+    line_starts = np.flatnonzero(new_line)
+    line_top = np.minimum.reduceat(boxes[order, 1], line_starts)
+    line_left = np.minimum.reduceat(boxes[order, 0], line_starts)
+    
+    new_paragraph = new_group[line_starts].copy()
+    pitch = np.diff(line_top)
+    same_group = ~new_paragraph[1:]
+    if same_group.any():
+        typical_pitch = max(float(np.median(pitch[same_group])), line_height)
+        new_paragraph[1:] |= pitch > paragraph_gap * typical_pitch
+    
+    # Обычный левый край — медиана строк колонки (в пределах полосы)
+    column_start = new_group[line_starts]
+    group_of_line = np.cumsum(column_start) - 1
+    by_group = np.lexsort((line_left, group_of_line))
+    group_starts = np.flatnonzero(column_start)
+    group_sizes = np.diff(np.append(group_starts, len(line_starts)))
+    typical_left = line_left[by_group[group_starts + (group_sizes - 1) // 2]]
+    indented = line_left > typical_left[group_of_line] + indent * line_height
+    new_paragraph[1:] |= indented[1:] & ~indented[:-1]
+    paragraph_of_line = np.cumsum(new_paragraph) - 1
+    
+    return order, line_of, paragraph_of_line[line_of]
+
+def page_paragraphs(ocr_results: List[Dict]) -> List[List[str]]:
+    """Абзацы страницы в порядке чтения: [[строка, ...], ...]"""
+    order, line_ids, paragraph_ids = reading_order(boxes_from_results(ocr_results))
+    
+    paragraphs = []
+    prev_line = prev_paragraph = -1
+    for idx, line_id, paragraph_id in zip(order.tolist(), line_ids.tolist(), paragraph_ids.tolist()):
+        text = ocr_results[idx]['text']
+        if paragraph_id != prev_paragraph:
+            paragraphs.append([text])
+        elif line_id != prev_line:
+            paragraphs[-1].append(text)
+        else:
+            paragraphs[-1][-1] += ' ' + text
+        prev_line, prev_paragraph = line_id, paragraph_id
+    return paragraphs
+
+def page_text(ocr_results: List[Dict]) -> str:
+    """Текст в порядке чтения: строки через перевод строки, абзацы — через пустую строку"""
+    return '\n\n'.join('\n'.join(lines) for lines in page_paragraphs(ocr_results))
\ No newline at end of file
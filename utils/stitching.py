@@ -0,0 +1,134 @@
+"""
+Склейка chunks, разорванных границей страницы
+
+Задание или абзац, начатые внизу страницы, продолжаются на следующей —
+без склейки получаются два неполных chunk'а. ChunkStitcher получает chunks
+постранично и держит открытым только последний chunk предыдущей страницы:
+если первый chunk новой страницы его продолжает, они склеиваются. В памяти
+нет ничего, кроме одного открытого chunk'а, и он держится не дольше
+max_pages страниц.
+"""
+
+import copy
+import re
+from typing import Callable, Dict, List
+
+from .ocr_normalize import HYPHEN_BREAK_PATTERN
+
+# Продолжение: начинается со строчной буквы, цифры или знака
+CONTINUATION_START = re.compile(r'[a-zа-яё0-9(,;:\-–—+=]')
+# Незаконченный текст: оборван на строчной букве, запятой или дефисе
+OPEN_END = re.compile(r'[a-zа-яё,\-–—]\s*$')
+
+def continues(open_text: str, next_text: str, marked: bool = False) -> bool:
+    """
+    Продолжает ли next_text (начало страницы) текст open_text (конец предыдущей)
+    
+    Обычному chunk'у нужны оба признака: оборванный конец и начало не с
+    заглавной. Для marked (текст до первого задания, заведомо хвост
+    предыдущего) достаточно одного.
+    """
+    starts = bool(CONTINUATION_START.match(next_text))
+    ends = bool(OPEN_END.search(open_text))
+    return starts or ends if marked else starts and ends
+
+class ChunkStitcher:
+    """
+    Потоковая склейка chunks через границы страниц
+    
+    Продолжение определяется по тексту (continues) и только для соседних
+    страниц. Chunk с metadata['continuation'] (текст страницы до первого
+    задания) без склейки отбрасывается — как и раньше, когда такой текст
+    не извлекался. Склеенный chunk сохраняет metadata['page'] первой
+    страницы и получает metadata['page_end']. Через заголовок в начале
+    страницы (новый § или тема) склейки нет никогда.
+    
+    Args:
+        annotate: Пересчитывает поля, извлекаемые из текста, после склейки
+        fit: Приводит склеенный chunk к допустимой длине (может разрезать)
+        max_pages: Сколько страниц подряд может занимать один chunk
+        marked_only: Продолжением может быть только chunk с
+            metadata['continuation'] (задания: следующее задание —
+            всегда новый chunk)
+    """
+    def __init__(
+        self,
+        annotate: Callable[[Dict], None],
+        fit: Callable[[List[Dict]], List[Dict]] | None = None,
+        max_pages: int = 3,
+        marked_only: bool = False
+    ):
+        self.annotate = annotate
+        self.fit = fit
+        self.max_pages = max_pages
+        self.marked_only = marked_only
+        self.stitched = 0
+        self._open = None
+        self._open_pages = 0
+        self._last_page = None
+    
+    def feed(self, page_num: int, chunks: List[Dict], heading_first: bool = False) -> List[Dict]:
+        """
+        Chunks страницы по порядку -> chunks, которые уже не изменятся
+        
+        heading_first: страница начинается с заголовка (маркеры заголовков
+        к этому моменту уже убраны из chunks)
+        """
+        done = []
+        chunks = list(chunks)
+        extendable = (
+            self._open is not None
+            and not heading_first
+            and self._last_page == page_num - 1
+            and self._open_pages < self.max_pages
+        )
+        self._last_page = page_num
+        
+        extended = False
+        if chunks:
+            first = chunks[0]
+            marked = first['metadata'].get('continuation', False)
+            if (
+                extendable
+                and (marked or not self.marked_only)
+                and continues(self._open['content']['text'], first['content']['text'], marked)
+            ):
+                self._extend(chunks.pop(0), page_num)
+                extended = True
+            elif marked:
+                chunks.pop(0)
+        
+        # Страница целиком ушла в продолжение — chunk остаётся открытым.
+        # После пустой страницы (или без продолжения) он закрывается
+        if not chunks and extended:
+            return done
+        
+        done.extend(self._close())
+        if chunks:
+            done.extend(chunks[:-1])
+            self._open = chunks[-1]
+            self._open_pages = 1
+        return done
+    
+    def finish(self) -> List[Dict]:
+        """Последний открытый chunk"""
+        return self._close()
+    
+    def _extend(self, chunk: Dict, page_num: int):
+        merged = copy.deepcopy(self._open)
+        text = merged['content']['text'] + '\n' + chunk['content']['text']
+        merged['content']['text'] = HYPHEN_BREAK_PATTERN.sub('', text)
+        merged['metadata']['page_end'] = page_num
+        self.annotate(merged)
+        
+        self._open = merged
+        self._open_pages += 1
+        self.stitched += 1
+    
+    def _close(self) -> List[Dict]:
+        chunk, self._open = self._open, None
+        if chunk is None:
+            return []
+        if self.fit is not None and 'page_end' in chunk['metadata']:
+            return self.fit([chunk])
+        return [chunk]
\ No newline at end of file
@@ -0,0 +1,116 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+TIMING_LOG_FILENAME = "timings.jsonl"
+
+# Стадии OCR-конвейера в порядке прохождения страницы
+STAGES = ('render', 'detect', 'recognize', 'build', 'write')
+
+class StageTimer:
+    """
+    Накопитель времени стадий одной страницы (секунды по имени стадии)
+    """
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+    
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+    
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+    
+    def to_dict(self) -> Dict[str, float]:
+        return {stage: round(seconds, 6) for stage, seconds in self.stages.items()}
+
+class TimingLog:
+    """
+    Журнал времени по страницам: одна JSON-строка на страницу
+    
+    Файл открывается на дозапись, каждая запись уходит одним write(),
+    поэтому в журнал могут одновременно писать worker-процессы пула
+    (объект передаётся в них как есть). Записи помечаются run_id,
+    чтобы отличать прогоны одной книги.
+    """
+    def __init__(self, path: Path, run_id: str):
+        self.path = path
+        self.run_id = run_id
+    
+    def write(self, page_num: int, timer: StageTimer, **fields):
+        record = {
+            'run_id': self.run_id,
+            'page': page_num,
+            **fields,
+            'stages': timer.to_dict(),
+            'total': round(sum(timer.stages.values()), 6)
+        }
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+def new_run_id() -> str:
+    """Идентификатор прогона: время запуска + pid"""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+def read_timing_log(path: Path, run_id: str | None = None) -> Iterator[Dict]:
+    """Записи журнала (только указанного прогона, если задан run_id)"""
+    if not path.exists():
+        return
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if run_id is None or record.get('run_id') == run_id:
+                yield record
+
+def aggregate_timings(
+    records: Iterable[Dict],
+    percentiles: Tuple[int, ...] = (50, 90, 99)
+) -> Dict[str, Dict]:
+    """
+    Сводка по стадиям: число страниц, сумма, среднее, перцентили и максимум (секунды)
+    
+    Стадия учитывается только на страницах, где она выполнялась
+    (страницы из текстового слоя не проходят detect/recognize).
+    Ключ 'total' — суммарное время страницы по всем стадиям.
+    """
+    values: Dict[str, List[float]] = {}
+    for record in records:
+        for stage, seconds in record['stages'].items():
+            values.setdefault(stage, []).append(seconds)
+        values.setdefault('total', []).append(record['total'])
+    
+    order = [stage for stage in STAGES if stage in values]
+    order += [stage for stage in values if stage not in order]
+    
+    summary = {}
+    for stage in order:
+        stage_values = np.asarray(values[stage], dtype=np.float64)
+        summary[stage] = {
+            'pages': len(stage_values),
+            'total': round(float(stage_values.sum()), 6),
+            'mean': round(float(stage_values.mean()), 6),
+            **{
+                f'p{q}': round(float(np.percentile(stage_values, q)), 6)
+                for q in percentiles
+            },
+            'max': round(float(stage_values.max()), 6)
+        }
+    
+    return summary
\ No newline at end of file